@@ -0,0 +1,70 @@
+'''
+Checks that rendering many charts does not grow the memory of the process.
+The resources and the PDF of a synthetic report are rendered again and again with the same Visualiser, as a batch run does, so
+table pages rendered as figures are measured too, and the memory still held after each round is traced. It exits with an error when the memory grew by more than the tolerance after the warm-up rounds.
+Run it from the repository root: python benchmarks/benchmarkFigureMemory.py [--rounds 20] [--tolerance 2]
+'''
+import argparse
+import gc
+import math
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import Handler as Handler
+import Visualiser as Visualiser
+from generateExport import generateExport
+
+def residentMB():
+    '''It returns the resident memory of the process, when the platform exposes it'''
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except (OSError, ValueError):
+        return float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory of repeated chart rendering')
+    parser.add_argument('--size', type=int, default=2_000, help='Tickets of the synthetic export')
+    parser.add_argument('--rounds', type=int, default=20, help='Times the report is rendered')
+    parser.add_argument('--warmup', type=int, default=3, help='Rounds rendered before the memory is measured')
+    parser.add_argument('--tolerance', type=float, default=2.0, help='Memory growth allowed after the warm-up, in MB')
+    parser.add_argument('--image-tables', action='store_true', help='Also render the ticket tables as figures')
+    args = parser.parse_args()
+
+    handler = Handler.Handler()
+    with tempfile.TemporaryDirectory() as directory:
+        df = handler.formatDf(handler.loadDf(generateExport(args.size, os.path.join(directory, 'export.csv'))))
+        visualiser = Visualiser.Visualiser(nativeTables= not args.image_tables)
+        visualiser.run(df, datetime(2024, 12, 1), datetime(2024, 12, 31), os.path.join(directory, 'report'), 'BENCHMARK', 'benchmark', 'azamara')
+
+    tracemalloc.start()
+    charts, baseline = 0, None
+    print(f"{'round':>6} {'charts':>7} {'traced MB':>10} {'RSS MB':>8} {'figures':>8}")
+    for index in range(1, args.rounds + 1):
+        visualiser.populateResources(df)
+        with tempfile.TemporaryDirectory() as directory:
+            visualiser.generatePDF(os.path.join(directory, 'report')) # Image table pages are only rendered as the PDF is written
+        charts = charts + sum(len(artifacts) for artifacts in visualiser.artifacts.values())
+        charts = charts + sum(math.ceil(len(tableDf) / visualiser.tableLength) for tableDf, _, _ in visualiser.tablePages.values())
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0] / 1024**2
+        if index == args.warmup:
+            baseline = traced
+        print(f"{index:>6} {charts:>7} {traced:>10.2f} {residentMB():>8.1f} {len(plt.get_fignums()):>8}")
+
+    growth = traced - (baseline if baseline is not None else traced)
+    print(f"Memory growth after the warm-up: {growth:.2f} MB over {charts} charts")
+    if growth > args.tolerance or plt.get_fignums():
+        print(f"FAILED: the memory grew by more than {args.tolerance} MB or figures were left open")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+'''
+Times the whole pipeline on synthetic JIRA exports: Handler.formatDf, Handler.mergeDf, Visualiser.populateResources and Visualiser.generatePDF.
+The exports are generated once per size and seed in benchmarks/data, so no JIRA access is needed.
+It also checks that formatted frames merge keeping the newest tickets.
+Results are written to benchmarks/results/<commit>.json, including the time of every stage, to be compared between commits.
+
+Run it from the repository root:
+    python benchmarks/benchmarkPipeline.py --sizes 1000 10000 100000
+    python benchmarks/benchmarkPipeline.py --sizes 1000000 --days 7 --compare benchmarks/results/<other commit>.json
+'''
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+
+benchmarksDirectory = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(benchmarksDirectory, '..', 'src'))
+import Handler as Handler
+import Visualiser as Visualiser
+from Profiler import Profiler
+from generateExport import generateExport, lastDate
+
+dataDirectory = os.path.join(benchmarksDirectory, 'data')
+resultsDirectory = os.path.join(benchmarksDirectory, 'results')
+measuredStages = ['loadDf', 'formatDf', 'mergeDf', 'populateResources', 'generatePDF']
+
+def commitId():
+    '''It returns the current commit, marked as dirty when the tree has uncommitted changes'''
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+def exportFile(size:int, seed:int, mixedDates:float):
+    '''It returns the export of @size tickets, generating it the first time'''
+    os.makedirs(dataDirectory, exist_ok=True)
+    fileName = os.path.join(dataDirectory, f'export_{size}_{seed}_{mixedDates}.csv')
+    if not os.path.exists(fileName):
+        print(f"Generating {fileName}")
+        generateExport(size, fileName, seed, mixedDates)
+    return fileName
+
+def runSize(fileName:str, args):
+    '''It runs the pipeline once on @fileName and returns the seconds of every stage'''
+    profiler = Profiler(memory= args.memory)
+    handler = Handler.Handler(profiler= profiler)
+    visualiser = Visualiser.Visualiser(workers= args.workers, vector= args.vector, nativeTables= not args.image_tables, profiler= profiler)
+    start = time.perf_counter()
+    rawDf = handler.loadDf(fileName)
+    # A history holding 90% of the tickets receives a delta whose first half is already known
+    historyDf, deltaDf = rawDf.iloc[:int(len(rawDf) * 0.9)].copy(), rawDf.iloc[int(len(rawDf) * 0.8):].copy()
+    handler.mergeDf(historyDf, deltaDf, policy= 'newest')
+    df = handler.formatDf(rawDf)
+    endDate = lastDate.to_pydatetime()
+    startDate = (lastDate - pd.Timedelta(days= args.days)).to_pydatetime()
+    with tempfile.TemporaryDirectory() as directory:
+        visualiser.run(df, startDate, endDate, os.path.join(directory, 'report'), 'BENCHMARK', 'benchmark', args.client)
+    totalTime = time.perf_counter() - start
+    totals = profiler.totals()
+    seconds = {stage: sum(total['seconds'] for total in totals if total['name'] == stage) for stage in measuredStages}
+    seconds['total'] = totalTime
+    checkFormattedMerge(rawDf)
+    return seconds, totals
+
+def checkFormattedMerge(rawDf:pd.DataFrame):
+    '''
+    It merges formatted frames keeping the newest tickets, as the GUI does after FORMAT. It is not timed.
+    The tickets of the delta are updated later and assigned to someone the history has never seen, so the assignee categories have to be widened.
+    '''
+    handler = Handler.Handler()
+    historyDf = handler.formatDf(rawDf.iloc[:int(len(rawDf) * 0.9)].copy())
+    deltaDf = handler.formatDf(rawDf.iloc[int(len(rawDf) * 0.8):int(len(rawDf) * 0.9)].copy()) # Only tickets the history already holds
+    deltaDf['updated'] = deltaDf['updated'] + pd.Timedelta(days= 1)
+    deltaDf['assignee'] = pd.Series('Benchmark Assignee', index= deltaDf.index, dtype= 'category')
+    mergedDf = handler.mergeDf(historyDf, deltaDf, policy= 'newest')
+    repeated = mergedDf['issue key'].isin(deltaDf['issue key'])
+    assert len(mergedDf) == historyDf['issue key'].nunique()
+    assert (mergedDf.loc[repeated, 'assignee'] == 'Benchmark Assignee').all()
+    assert pd.api.types.is_datetime64_any_dtype(mergedDf['updated'])
+
+def compare(results:list, baseFile:str):
+    '''It prints the ratio between the times of @results and those of the same sizes in @baseFile'''
+    with open(baseFile, 'r') as file:
+        base = json.load(file)
+    baseResults = {result['size']: result['seconds'] for result in base['results']}
+    print(f"\nCompared with {base['commit']} (ratio below 1 is faster)")
+    print(f"{'rows':>10} " + ' '.join(f'{stage:>18}' for stage in measuredStages + ['total']))
+    for result in results:
+        if result['size'] not in baseResults:
+            continue
+        ratios = [result['seconds'][stage] / baseResults[result['size']][stage] if baseResults[result['size']].get(stage) else float('nan') for stage in measuredStages + ['total']]
+        print(f"{result['size']:>10} " + ' '.join(f'{ratio:>17.2f}x' for ratio in ratios))
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark on synthetic JIRA exports')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mixed-dates', type=float, default=0.05, help='Share of the dates written in a format other than the JIRA one')
+    parser.add_argument('--days', type=int, default=30, help='Days covered by the report, ending on the last day of the data')
+    parser.add_argument('--client', default='azamara')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--vector', action='store_true')
+    parser.add_argument('--image-tables', action='store_true')
+    parser.add_argument('--memory', action='store_true', help='Also trace the peak memory of every stage. It slows the run down')
+    parser.add_argument('--compare', metavar='FILE', help='Results file of another commit to compare with')
+    parser.add_argument('--output', help='Results file. By default benchmarks/results/<commit>.json')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        fileName = exportFile(size, args.seed, args.mixed_dates)
+        seconds, stages = runSize(fileName, args)
+        results.append({'size': size, 'seconds': seconds, 'stages': stages})
+
+    commit = commitId()
+    report = {'commit': commit, 'date': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+              'pandas': pd.__version__, 'machine': platform.platform(), 'cpus': os.cpu_count(),
+              'settings': {key: value for key, value in vars(args).items() if key not in ('compare', 'output')}, 'results': results}
+    outputFile = args.output or os.path.join(resultsDirectory, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(outputFile)), exist_ok=True)
+    with open(outputFile, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print(f"\n{'rows':>10} " + ' '.join(f'{stage:>18}' for stage in measuredStages + ['total']))
+    for result in results:
+        print(f"{result['size']:>10} " + ' '.join(f"{result['seconds'][stage]:>17.3f}s" for stage in measuredStages + ['total']))
+    print(f"Results written to {outputFile}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
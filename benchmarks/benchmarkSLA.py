@@ -0,0 +1,68 @@
+'''
+Compares the column-wise SLA engine in Handler against the original iterrows loop.
+Run it from the repository root: python benchmarks/benchmarkSLA.py [--sizes 10000 100000 1000000]
+'''
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import Handler as Handler
+
+def legacyAssignActuals(handler:Handler.Handler, df:pd.DataFrame):
+    '''The row by row implementation previously used in Handler._handleValues'''
+    df['actual response'] = pd.NA
+    df['actual resolution'] = pd.NA
+    for index, row in df.iterrows():
+        resolution = row['resolution time']
+        response = row['response time']
+        resolutionTarget = int(handler.resolutionAgreed.get(row['priority'], pd.NA))
+        responseTarget = int(handler.responseAgreed.get(row['priority'], pd.NA))
+        if pd.notna(resolution) and resolution <= resolutionTarget: df.at[index,'actual resolution'] = resolutionTarget - resolution
+        elif pd.notna(resolution) and resolution > resolutionTarget: df.at[index,'actual resolution'] = resolution
+
+        if pd.notna(response) and response <= responseTarget: df.at[index,'actual response'] = responseTarget - response
+        elif pd.notna(response) and response > responseTarget: df.at[index,'actual response'] = response
+    return df
+
+def buildFrame(size:int, seed:int = 0):
+    '''It builds a frame with the columns used by the SLA engine. Roughly 10% of the durations are empty'''
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'priority': rng.choice(['P1', 'P2', 'P3', 'P4'], size),
+        'response time': rng.integers(0, 2000, size).astype(float),
+        'resolution time': rng.integers(0, 5000, size).astype(float),
+    })
+    for col in ['response time', 'resolution time']:
+        df.loc[rng.random(size) < 0.1, col] = np.nan
+    return df
+
+def timeIt(function, df:pd.DataFrame):
+    start = time.perf_counter()
+    result = function(df.copy())
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description='SLA engine benchmark')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--skip-legacy-above', type=int, default=None, help='Do not time the legacy loop above this size')
+    args = parser.parse_args()
+
+    handler = Handler.Handler()
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speed-up':>10}")
+    for size in args.sizes:
+        df = buildFrame(size)
+        vectorTime, vectorDf = timeIt(handler._assignActuals, df)
+        if args.skip_legacy_above and size > args.skip_legacy_above:
+            print(f"{size:>10} {'-':>12} {vectorTime:>15.4f} {'-':>10}")
+            continue
+        legacyTime, legacyDf = timeIt(lambda auxDf: legacyAssignActuals(handler, auxDf), df)
+        for col in ['actual response', 'actual resolution']:
+            pd.testing.assert_series_equal(vectorDf[col], legacyDf[col].astype('Int64'))
+        print(f"{size:>10} {legacyTime:>12.4f} {vectorTime:>15.4f} {legacyTime / vectorTime:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
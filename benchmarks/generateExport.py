@@ -0,0 +1,111 @@
+'''
+Generates synthetic "Export CSV (all fields)" files shaped like the JIRA exports the reports are built from.
+Priorities, statuses and clients are taken from details.json, so the files go through the Handler like a real export.
+Run it from the repository root: python benchmarks/generateExport.py 100000 export.csv [--seed 0] [--mixed-dates 0.05]
+'''
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from Config import Config
+
+chunkSize = 100_000
+dateFormat = '%d/%b/%y %I:%M %p' # Default JIRA export format
+otherDateFormats = ['%Y-%m-%d %H:%M', '%d/%m/%Y %H:%M']
+firstDate = pd.Timestamp('2023-01-01')
+lastDate = pd.Timestamp('2024-12-31 23:59')
+issueTypes = ['Incident', 'Service Request', 'Change', 'Problem']
+ticketSources = ['Email', 'Phone', 'Portal', 'Chat', 'Monitoring']
+locations = ['Miami', 'London', 'Southampton', 'Sydney']
+people = [f'agent.{index}' for index in range(40)]
+summaries = ['Printer not working on deck 5', 'Laptop does not boot after the last update', 'Request for a new mailbox',
+             'VPN drops every few minutes while connected to the ship network', 'Password reset', 'Change of the firewall rules']
+
+def generateChunk(rng:np.random.Generator, start:int, size:int, config:Config, mixedDates:float = 0.0):
+    '''It returns @size tickets, numbered from @start, with the columns and value formats of a JIRA export'''
+    priorities = config['priorityLabels']
+    weights = np.arange(1, len(priorities) + 1) # Urgent tickets are the least common
+    created = firstDate + pd.to_timedelta(rng.integers(0, (lastDate - firstDate).total_seconds() // 60, size), unit='min')
+    updated = created + pd.to_timedelta(rng.integers(0, 60 * 24 * 30, size), unit='min')
+    df = pd.DataFrame({
+        'Summary': rng.choice(summaries, size),
+        'Issue key': [f'ICE-{index}' for index in range(start, start + size)],
+        'Issue id': np.arange(start, start + size) + 10_000,
+        'Issue Type': rng.choice(issueTypes, size),
+        'Status': generateStatuses(rng, created, config),
+        'Priority': rng.choice(priorities, size, p=weights / weights.sum()),
+        'Resolution': rng.choice(['Done', ''], size),
+        'Assignee': rng.choice(people, size),
+        'Reporter': rng.choice(people, size),
+        'Created': formatDates(rng, created, mixedDates),
+        'Updated': formatDates(rng, updated, mixedDates),
+        'Labels': '',
+        'Custom field (Category)': rng.choice(['Hardware', 'Software', 'Network', 'Access'], size),
+        'Custom field (Time to resolution)': formatDurations(rng, size, 5000),
+        'Custom field (First time fix)': rng.choice(['Yes', 'No', ''], size),
+        'Custom field (In Scope)': rng.choice(['Yes', 'No', ''], size),
+        'Custom field (Time to first response)': formatDurations(rng, size, 1500),
+        'Custom field (Cost Centre)': rng.choice(config['clients'], size),
+        'Time Spent': rng.integers(0, 36_000, size),
+        'Custom field (Location)': rng.choice(locations, size),
+        'Custom field (Ticket Source)': rng.choice(ticketSources, size),
+        'Satisfaction rating': pd.Series(rng.integers(1, 6, size)).where(rng.random(size) < 0.3).astype('Int64'),
+    })
+    # Exports repeat some columns and carry many custom fields the reports do not use
+    df.insert(12, 'Labels', '', allow_duplicates=True)
+    for index in range(20):
+        df[f'Custom field (Unused {index})'] = rng.choice(['', 'value'], size)
+    return df
+
+def generateStatuses(rng:np.random.Generator, created:pd.DatetimeIndex, config:Config):
+    '''Most tickets are closed. Half of those created in the last 60 days are still open, and a few have a status that is neither'''
+    recent = np.asarray(created > lastDate - pd.Timedelta(days=60))
+    draw = rng.random(len(created))
+    statuses = rng.choice(config['statusClosed'], len(created)).astype(object)
+    isOpen = draw < np.where(recent, 0.5, 0.01)
+    statuses[isOpen] = rng.choice(config['statusOpen'], isOpen.sum())
+    statuses[draw > 0.98] = 'cancelled'
+    return pd.Series(statuses).str.title()
+
+def formatDates(rng:np.random.Generator, dates:pd.DatetimeIndex, mixedDates:float):
+    '''It writes the dates in the JIRA format. A share @mixedDates of them is written in other formats'''
+    text = pd.Series(dates.strftime(dateFormat))
+    if mixedDates > 0:
+        mixed = rng.random(len(text)) < mixedDates
+        other = str(rng.choice(otherDateFormats))
+        text[mixed] = pd.Series(dates[mixed].strftime(other), index=text.index[mixed])
+    return text
+
+def formatDurations(rng:np.random.Generator, size:int, maxMinutes:int):
+    '''It writes SLA durations as HH:MM. Breached SLAs are negative, some are reported as >99h and some are empty'''
+    minutes = rng.integers(0, maxMinutes, size)
+    text = pd.Series(minutes // 60).astype(str) + ':' + pd.Series(minutes % 60).astype(str).str.zfill(2)
+    kind = rng.random(size)
+    text = text.where(kind >= 0.2, '-' + text)
+    text = text.where((kind < 0.2) | (kind >= 0.22), '>99h')
+    return text.where(kind < 0.95, '')
+
+def generateExport(size:int, fileName:str, seed:int = 0, mixedDates:float = 0.0):
+    '''It writes an export of @size tickets to @fileName in chunks, so 1M+ ticket files do not need to fit in memory'''
+    rng = np.random.default_rng(seed)
+    config = Config.load()
+    for start in range(0, size, chunkSize):
+        chunk = generateChunk(rng, start, min(chunkSize, size - start), config, mixedDates)
+        chunk.to_csv(fileName, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    return fileName
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic JIRA export generator')
+    parser.add_argument('size', type=int, help='Number of tickets')
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mixed-dates', type=float, default=0.0, help='Share of the dates written in a format other than the JIRA one')
+    args = parser.parse_args()
+    generateExport(args.size, args.output, args.seed, args.mixed_dates)
+    print(f"{args.size} tickets written to {args.output}")
+
+if __name__ == '__main__':
+    main()
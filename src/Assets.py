@@ -0,0 +1,53 @@
+import os
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+
+class Assets:
+    '''
+    Process-level cache of the static images of the reports, such as the logos of the cover page.
+    Each file is decoded once, and downscaled once for every size it is drawn at, so batch runs do not decode and compress the same logos for every report.
+    Entries are keyed by the modification time of the file, so a replaced logo is read again.
+    '''
+    pixelsPerPoint = 2 # Resolution kept when downscaling, about 144 dpi
+    _images = {}
+    _readers = {}
+    _directories = {}
+
+    @classmethod
+    def image(cls, fileName:str):
+        '''It returns the decoded image of @fileName. The file name is matched without case if there is no exact match'''
+        fileName = cls._resolve(fileName)
+        key = (fileName, os.path.getmtime(fileName))
+        if key not in cls._images:
+            image = Image.open(fileName)
+            image.load()
+            cls._images[key] = image
+        return cls._images[key]
+
+    @classmethod
+    def reader(cls, image:Image.Image, width:float, height:float):
+        '''
+        It returns the image of a cached file downscaled to @width x @height points, ready to be drawn with Canvas.drawImage.
+        The same reader is returned for the same size, so reportlab embeds it once per document as a shared image.
+        '''
+        size = (max(round(width * cls.pixelsPerPoint), 1), max(round(height * cls.pixelsPerPoint), 1))
+        key = (image.filename, os.path.getmtime(image.filename), size)
+        if key not in cls._readers:
+            scaled = image.resize(size, Image.LANCZOS) if size[0] < image.width else image
+            cls._readers[key] = ImageReader(scaled)
+        return cls._readers[key]
+
+    @classmethod
+    def isAsset(cls, image):
+        '''It tells whether @image was loaded through the cache, rather than from rendered bytes'''
+        return bool(getattr(image, 'filename', None))
+
+    @classmethod
+    def _resolve(cls, fileName:str):
+        '''It returns the name of the file in its directory that matches @fileName, ignoring case, or @fileName itself'''
+        if os.path.exists(fileName):
+            return fileName
+        directory, name = os.path.split(fileName)
+        if name.lower() not in cls._directories.get(directory, {}): # Listed again in case the file was added since
+            cls._directories[directory] = {entry.lower(): entry for entry in os.listdir(directory)} if os.path.isdir(directory) else {}
+        return os.path.join(directory, cls._directories[directory].get(name.lower(), name))
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import tempfile
+import time
+import pandas as pd
+
+try:
+    import pyarrow # noqa: F401 Parquet support for pandas
+    hasParquet = True
+except ImportError:
+    hasParquet = False
+
+class Cache:
+    '''
+    Local store of formatted dataframes, keyed by the content of the files they were produced from.
+    Parquet keeps the typed columns (Int64, string, datetime) so a cached frame does not need to be formatted again.
+    If pyarrow is not installed the frames are pickled instead, which also preserves the dtypes.
+    Rendered charts are kept in the same directory as raw bytes, keyed by the data they were drawn from.
+    '''
+    blockSize = 1024 * 1024
+
+    def __init__(self, directory:str = 'cache', maxSizeMB:int = 2048, maxAgeDays:int = 30, enabled:bool = True):
+        self.directory = directory
+        self.maxBytes = maxSizeMB * 1024 * 1024
+        self.maxAge = maxAgeDays * 24 * 60 * 60
+        self.enabled = enabled
+        self.extension = '.parquet' if hasParquet else '.pkl'
+
+    @classmethod
+    def fromConfiguration(cls, settings:dict):
+        '''It builds the cache from the "cache" entry of details.json'''
+        return cls(directory= settings.get('directory', 'cache'), maxSizeMB= settings.get('maxSizeMB', 2048),
+                   maxAgeDays= settings.get('maxAgeDays', 30), enabled= settings.get('enabled', True))
+
+    def key(self, *fileNames:str):
+        '''It returns a hash of the content of all the files provided'''
+        digest = hashlib.sha256()
+        for fileName in fileNames:
+            with open(fileName, 'rb') as file:
+                while block := file.read(self.blockSize):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def load(self, key:str):
+        '''It returns the dataframe stored under @key, or None if there is none'''
+        if not self.enabled:
+            return None
+        fileName = self._path(key)
+        if not os.path.exists(fileName):
+            return None
+        try:
+            df = pd.read_parquet(fileName) if hasParquet else pd.read_pickle(fileName)
+        except Exception as e:
+            print(f"[Cache]: The file {fileName} could not be read ({e})")
+            return None
+        os.utime(fileName) # Recently used entries are evicted last
+        print(f"[Cache]: Dataframe loaded from {fileName}")
+        return df
+
+    def store(self, key:str, df:pd.DataFrame):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fileName = self._path(key)
+        try:
+            self._write(fileName, lambda path: df.to_parquet(path, index=False) if hasParquet else df.to_pickle(path))
+        except Exception as e:
+            print(f"[Cache]: The dataframe could not be stored ({e})")
+            return
+        self.evict()
+
+    def loadBytes(self, key:str, extension:str):
+        '''It returns the bytes stored under @key (e.g. a rendered chart), or None if there are none'''
+        if not self.enabled:
+            return None
+        fileName = self._path(key, extension)
+        try:
+            with open(fileName, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+        os.utime(fileName)
+        return data
+
+    def storeBytes(self, key:str, data:bytes, extension:str):
+        '''It stores @data under @key. Entries are not evicted here, so callers storing many of them call evict() once afterwards'''
+        if not self.enabled or data is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        def write(path):
+            with open(path, 'wb') as file:
+                file.write(data)
+        try:
+            self._write(self._path(key, extension), write)
+        except OSError as e:
+            print(f"[Cache]: The entry {key} could not be stored ({e})")
+
+    def evict(self):
+        '''It removes the entries older than the maximum age and then the least recently used ones until the size limit is met'''
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for fileName in os.listdir(self.directory):
+            path = os.path.join(self.directory, fileName)
+            try:
+                stats = os.stat(path)
+            except FileNotFoundError: # Removed by another process evicting at the same time
+                continue
+            entries.append((stats.st_mtime, stats.st_size, path))
+        entries.sort()
+        now = time.time()
+        totalSize = sum(size for _, size, _ in entries)
+        for modified, size, path in entries:
+            if now - modified > self.maxAge or totalSize > self.maxBytes:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                totalSize = totalSize - size
+
+    def _write(self, fileName:str, write):
+        '''
+        It calls @write with a temporary file next to @fileName and then moves it into place.
+        Processes sharing the cache never read a partially written entry, and an interrupted run does not leave a corrupt one.
+        '''
+        handle, tempName = tempfile.mkstemp(dir=self.directory, prefix='.', suffix='.tmp')
+        os.close(handle)
+        try:
+            write(tempName)
+            os.replace(tempName, fileName)
+        except BaseException:
+            try:
+                os.remove(tempName)
+            except OSError:
+                pass
+            raise
+
+    def _path(self, key:str, extension:str = None):
+        return os.path.join(self.directory, f'{key}{extension or self.extension}')
@@ -0,0 +1,60 @@
+import json
+import os
+
+class Config:
+    '''
+    Content of details.json, read once per process and shared by the Handler, the Visualiser and the GUI.
+    It only depends on the standard library, so it can be loaded before the heavy modules are imported.
+    The SLA targets and statuses are compiled once into typed lookups, and the file is read again when it changes on disk.
+    '''
+    detailsFile = 'tools/details.json'
+    _instances = {}
+
+    def __init__(self, fileName:str):
+        self.fileName = fileName
+        self.mtime = os.path.getmtime(fileName)
+        with open(fileName, 'r') as file:
+            self.data = json.load(file)
+        self._compile()
+
+    @classmethod
+    def load(cls, fileName:str = None):
+        '''
+        It returns the shared configuration of @fileName. The file is only read again when its modification time changed.
+        If the changed file cannot be read, e.g. while it is being saved, the previous configuration is kept and the file is read again on the next call.
+        '''
+        fileName = fileName or cls.detailsFile
+        config = cls._instances.get(fileName)
+        if config is None:
+            cls._instances[fileName] = cls(fileName)
+        elif config._changed():
+            print(f"[Config]: {fileName} changed, reading it again")
+            try:
+                cls._instances[fileName] = cls(fileName)
+            except (OSError, ValueError) as e:
+                print(f"[Config]: {fileName} could not be read, the previous configuration is kept ({e})")
+        return cls._instances[fileName]
+
+    def __getitem__(self, key:str):
+        return self.data[key]
+
+    def get(self, key:str, default=None):
+        return self.data.get(key, default)
+
+    def _changed(self):
+        '''It tells whether the file was modified since it was read. A file that can no longer be read keeps the last configuration'''
+        try:
+            return os.path.getmtime(self.fileName) != self.mtime
+        except OSError:
+            return False
+
+    def _compile(self):
+        '''
+        It builds the lookups used column-wise by the Handler and the Visualiser:
+        - responseTargets and resolutionTargets map each priority to its SLA in minutes, as integers.
+        - statusMap maps each lower case JIRA status to its resolution, 'Open' or 'Closed'. Closed wins if a status is listed in both.
+        '''
+        self.responseTargets = {priority: int(target) for priority, target in self.data.get('SLAresponse', {}).items()}
+        self.resolutionTargets = {priority: int(target) for priority, target in self.data.get('SLAresolution', {}).items()}
+        self.statusMap = {status.strip().lower(): 'Open' for status in self.data.get('statusOpen', [])}
+        self.statusMap.update({status.strip().lower(): 'Closed' for status in self.data.get('statusClosed', [])})
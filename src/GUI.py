@@ -1,5 +1,5 @@
 import PySimpleGUI as sg
-import json
+from Config import Config
 from datetime import datetime as dt
 
 class GUI:
@@ -65,11 +65,25 @@ class GUI:
         else:
             return startingDate, endDate, filepath, title, author, client, checkBox
 
+    def showProgress(self, stage:str, done:int, total:int):
+        '''It shows the stage of the operation running in the background. The bar only moves when the total is known'''
+        if total:
+            self.window['STATUS'].update(f"{stage}: {done}/{total}")
+            self.window['PROGRESSBAR'].update(current_count= done, max= total)
+        else:
+            self.window['STATUS'].update(f"{stage}: {done}" if done else stage)
+
     def changeLayout(self, title:str, layout:list):
         self.window.close()
         self.window = sg.Window(title, layout, element_justification='c', finalize=True)
         self.currentLayout = title
 
+    def _progressLayout(self):
+        return [
+            [sg.Text('', key='STATUS', size=(40, 1))],
+            [sg.ProgressBar(1, orientation='h', size=(20, 15), key='PROGRESSBAR'), sg.Button('CANCEL', size=(10, 1))]
+        ]
+
     def _mainLayout(self):
         return [
             [sg.Text('Please select a file to start')],
@@ -84,11 +98,12 @@ class GUI:
             [sg.Text('Add additional dataframes')],
             [sg.FileBrowse(button_text='BROWSE', target='FILEPATHMERGE', size=(40, 1))],
             [sg.InputText(key='FILEPATHMERGE', size=(32, 1)), sg.Button('MERGE', size=(10, 1))],
+            [sg.Checkbox('Keep the most recently updated tickets', key='NEWEST', default=False)],
             [sg.Text('Format dataframe')],
             [sg.Button('FORMAT', size=(40, 1))],
             [sg.InputText(key='FILEPATHOUTPUT', size=(1, 1), visible=False)],
             [sg.FileSaveAs(button_text='SELECT OUTPUT',target='FILEPATHOUTPUT', size=(28, 1)),sg.Button('SAVE', size=(10, 1))]
-        ]
+        ] + self._progressLayout()
 
     def _report1Layout(self):
         today = dt.today()
@@ -101,9 +116,7 @@ class GUI:
         years = [i for i in range(today.year-3, today.year+1)]
         ys1 = sg.Spin(years, initial_value=str(today.year), readonly=True, size=15, enable_events=True, key='YEAR1')
         ys2 = sg.Spin(years, initial_value=str(today.year), readonly=True, size=15, enable_events=True, key='YEAR2')
-        with open(self.detailsFile, 'r') as file:
-            data = json.load(file)
-            clients = data['clients']
+        clients = Config.load(self.detailsFile)['clients']
 
         return [
             [sg.Text('Title   '), sg.InputText(key='TITLE', default_text= 'MANAGED SERVICE REPORT', size=(30, 1))],
@@ -117,4 +130,4 @@ class GUI:
             [sg.FileSaveAs(target='FILEPATH', button_text='SELECT OUTPUT', size=(28, 1)),sg.Button('SAVE', size=(10, 1))],
             [sg.Checkbox('Do you want to save the formatted file?', key = 'CHECK',size=(30,1), default=False)],
             [sg.InputText(key='FILEPATH', size=(1, 1), visible=False)]
-        ]
\ No newline at end of file
+        ] + self._progressLayout()
\ No newline at end of file
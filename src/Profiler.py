@@ -0,0 +1,116 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+class Profiler:
+    '''
+    Wall time, peak memory and row counts of the pipeline stages of the Handler and the Visualiser.
+    Stages nest, so every record keeps its path (e.g. "formatDf;_handleValues") and the results can be read as a flame graph.
+    Peak memory is traced with tracemalloc, which slows the run down, so it is only measured when @memory is set.
+    '''
+    def __init__(self, enabled:bool = True, memory:bool = False):
+        self.enabled = enabled
+        self.memory = memory
+        self.records = []
+        self._stack = []
+        self._entries = 0
+
+    @contextmanager
+    def stage(self, name:str, rows:int = None):
+        '''
+        It records the stage run inside the with block. The record is yielded, so the rows can also be set once they are known:
+            with profiler.stage('loadDf') as record:
+                ...
+                record['rows'] = len(df)
+        '''
+        record = {'stage': ';'.join([parent['name'] for parent in self._stack] + [name]), 'name': name, 'depth': len(self._stack), 'rows': rows}
+        if not self.enabled:
+            yield record
+            return
+        record['order'] = self._entries
+        self._entries = self._entries + 1
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._foldPeak()
+            record['_start'], record['_peak'] = tracemalloc.get_traced_memory()[0], 0
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self.memory:
+                self._foldPeak()
+                record['peakMB'] = max(record.pop('_peak') - record.pop('_start'), 0) / 1024**2
+            self._stack.pop()
+            self.records.append(record)
+
+    def merge(self, records:list):
+        '''It adds records measured elsewhere (e.g. in a worker process) below the stage currently open'''
+        if not self.enabled:
+            return
+        prefix = [parent['name'] for parent in self._stack]
+        for record in sorted(records, key=lambda record: record['order']):
+            self.records.append({**record, 'stage': ';'.join(prefix + [record['stage']]), 'depth': record['depth'] + len(prefix), 'order': self._entries})
+            self._entries = self._entries + 1
+
+    def reset(self):
+        self.records = []
+        self._entries = 0
+
+    def totals(self):
+        '''It returns the records aggregated by stage path, in the order the stages were first entered'''
+        totals = {}
+        for record in sorted(self.records, key=lambda record: record['order']):
+            total = totals.setdefault(record['stage'], {'stage': record['stage'], 'name': record['name'], 'depth': record['depth'], 'calls': 0, 'seconds': 0.0, 'rows': None, 'peakMB': None})
+            total['calls'] = total['calls'] + 1
+            total['seconds'] = total['seconds'] + record['seconds']
+            if record['rows'] is not None:
+                total['rows'] = (total['rows'] or 0) + record['rows']
+            if record.get('peakMB') is not None:
+                total['peakMB'] = max(total['peakMB'] or 0, record['peakMB'])
+        paths = list(totals) # First entry order
+        def treeOrder(stage:str):
+            parts = stage.split(';')
+            prefixes = [';'.join(parts[:depth]) for depth in range(1, len(parts) + 1)]
+            return [paths.index(prefix) if prefix in totals else -1 for prefix in prefixes]
+        return sorted(totals.values(), key=lambda total: treeOrder(total['stage']))
+
+    def toJson(self, fileName:str = None):
+        '''It returns the records and their totals as JSON, and writes them to @fileName if one is given'''
+        content = json.dumps({'records': self.records, 'totals': self.totals()}, indent=2)
+        if fileName:
+            with open(fileName, 'w') as file:
+                file.write(content)
+        return content
+
+    def toFolded(self):
+        '''It returns the self time of every stage path in milliseconds, in the folded format read by flame graph tools'''
+        totals = {total['stage']: total['seconds'] for total in self.totals()}
+        selfTimes = dict(totals)
+        for stage, seconds in totals.items():
+            parent = stage.rpartition(';')[0]
+            if parent in selfTimes:
+                selfTimes[parent] = selfTimes[parent] - seconds
+        return '\n'.join(f"{stage} {max(round(seconds * 1000), 0)}" for stage, seconds in selfTimes.items())
+
+    def summary(self, width:int = 30):
+        '''It returns the totals as an indented tree, with a bar showing the share of the run taken by each stage'''
+        totals = self.totals()
+        runTime = sum(total['seconds'] for total in totals if total['depth'] == 0) or 1
+        lines = [f"{'STAGE':<45} {'CALLS':>5} {'TIME (s)':>9} {'PEAK MB':>8} {'ROWS':>9}"]
+        for total in totals:
+            bar = '#' * round(width * total['seconds'] / runTime)
+            peak = f"{total['peakMB']:.1f}" if total['peakMB'] is not None else '-'
+            rows = total['rows'] if total['rows'] is not None else '-'
+            lines.append(f"{'  ' * total['depth'] + total['name']:<45} {total['calls']:>5} {total['seconds']:>9.3f} {peak:>8} {rows:>9} {bar}")
+        return '\n'.join(lines)
+
+    def _foldPeak(self):
+        '''It keeps the peak reached so far in every open stage, and restarts the tracing peak for the next one'''
+        peak = tracemalloc.get_traced_memory()[1]
+        for record in self._stack:
+            record['_peak'] = max(record['_peak'], peak)
+        tracemalloc.reset_peak()
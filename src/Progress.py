@@ -0,0 +1,29 @@
+import threading
+
+class Cancelled(Exception):
+    '''Raised by Progress.update once the operation has been cancelled'''
+
+class Progress:
+    '''
+    Stage-level progress of a long operation and its cancellation flag.
+    The Handler and the Visualiser report every stage through update(), which is also where a cancelled operation stops.
+    '''
+    def __init__(self, callback = None):
+        '''
+        Args:
+            callback: Function called with (stage, done, total) on every update. total is 0 when it is not known.
+        '''
+        self.callback = callback
+        self.cancelled = threading.Event()
+
+    def update(self, stage:str, done:int = 0, total:int = 0):
+        if self.cancelled.is_set():
+            raise Cancelled(stage)
+        if self.callback:
+            self.callback(stage, done, total)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def reset(self):
+        self.cancelled.clear()
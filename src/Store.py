@@ -0,0 +1,141 @@
+import sqlite3
+import pandas as pd
+
+class Store:
+    '''
+    Local SQLite database of formatted tickets, one row per issue key.
+    Tickets are upserted, so the history grows with every export and only the tickets that changed need to be exported again.
+    Reports read back the tickets they need through the indexes on 'created', 'priority' and 'resolution'.
+    '''
+    tableName = 'tickets'
+    keyColumn = 'issue key'
+    indexedColumns = ['created', 'priority', 'resolution']
+    dateFormat = '%Y-%m-%d %H:%M:%S'
+
+    def __init__(self, fileName:str = 'tickets.db'):
+        self.fileName = fileName
+        self.connection = sqlite3.connect(fileName)
+
+    def close(self):
+        self.connection.close()
+
+    def upsert(self, df:pd.DataFrame):
+        '''It inserts the tickets of a formatted dataframe, replacing the stored ones with the same issue key'''
+        self._createTable(df)
+        columns = list(df.columns)
+        names = ', '.join(self._quote(col) for col in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        updates = ', '.join(f'{self._quote(col)} = excluded.{self._quote(col)}' for col in columns if col != self.keyColumn)
+        statement = f'INSERT INTO {self.tableName} ({names}) VALUES ({placeholders}) ON CONFLICT({self._quote(self.keyColumn)}) DO UPDATE SET {updates}'
+        with self.connection:
+            self.connection.executemany(statement, self._toRows(df))
+        print(f"[Store]: {len(df)} tickets upserted into {self.fileName}")
+
+    def query(self, startDate = None, endDate = None, includeOpen:bool = False, filters:dict = None):
+        '''
+        It returns the tickets created between @startDate and @endDate (both optional) as a typed dataframe.
+
+        Args:
+            includeOpen: Also return the tickets still open, whenever they were created.
+            filters: Column values the tickets must match, e.g. {'cost centre': 'azamara'}.
+        '''
+        if not self._hasTable():
+            return pd.DataFrame()
+        conditions, parameters = [], []
+        if startDate is not None:
+            conditions.append('created >= ?')
+            parameters.append(pd.Timestamp(startDate).strftime(self.dateFormat))
+        if endDate is not None:
+            conditions.append('created <= ?')
+            parameters.append(pd.Timestamp(endDate).strftime(self.dateFormat))
+        if conditions and includeOpen:
+            conditions = [f"(({' AND '.join(conditions)}) OR resolution = 'Open')"]
+        where = self._where(conditions, parameters, filters)
+        df = pd.read_sql_query(f'SELECT * FROM {self.tableName}{where}', self.connection, params=parameters)
+        return self._restoreTypes(df)
+
+    def priorityTotals(self, filters:dict = None, groupBy:list = None):
+        '''
+        It returns the tickets, SLA sums and first time fixes of each priority over the whole history, in a single group-by on the indexed table.
+        Reports read only a window of the tickets, so the totals that cover every ticket are computed here instead.
+
+        Args:
+            filters: Column values the tickets must match, as in query.
+            groupBy: Columns the totals are also split by, e.g. ['cost centre'].
+        '''
+        columns = ['count', 'responseSum', 'resolutionSum', 'firstFix']
+        keys = (groupBy or []) + ['priority']
+        if not self._hasTable():
+            return pd.DataFrame(columns=keys + columns)
+        parameters = []
+        where = self._where([], parameters, filters)
+        names = ', '.join(self._quote(col) for col in keys)
+        statement = (f'SELECT {names}, COUNT(*) AS count, COALESCE(SUM("actual response"), 0) AS responseSum, '
+                     f'COALESCE(SUM("actual resolution"), 0) AS resolutionSum, COALESCE(SUM("first time fix" = \'Yes\'), 0) AS firstFix '
+                     f'FROM {self.tableName}{where} GROUP BY {names}')
+        df = pd.read_sql_query(statement, self.connection, params=parameters)
+        df[columns] = df[columns].astype('int64')
+        return df
+
+# PRIVATE METHODS
+    def _hasTable(self):
+        cursor = self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (self.tableName,))
+        return cursor.fetchone() is not None
+
+    def _where(self, conditions:list, parameters:list, filters:dict = None):
+        '''It adds the @filters to the @conditions and @parameters, and returns the WHERE clause joining them'''
+        for column, value in (filters or {}).items():
+            conditions.append(f'{self._quote(column)} = ?')
+            parameters.append(value)
+        return f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    def _createTable(self, df:pd.DataFrame):
+        '''It creates the table and its indexes, and adds any column of @df the table does not have yet'''
+        with self.connection:
+            if not self._hasTable():
+                definitions = [f'{self._quote(col)} {self._sqlType(df[col])}' + (' PRIMARY KEY' if col == self.keyColumn else '') for col in df.columns]
+                self.connection.execute(f"CREATE TABLE {self.tableName} ({', '.join(definitions)})")
+            else:
+                existing = [row[1] for row in self.connection.execute(f'PRAGMA table_info({self.tableName})')]
+                for col in df.columns:
+                    if col not in existing:
+                        self.connection.execute(f'ALTER TABLE {self.tableName} ADD COLUMN {self._quote(col)} {self._sqlType(df[col])}')
+            for col in self.indexedColumns:
+                if col in df.columns:
+                    self.connection.execute(f'CREATE INDEX IF NOT EXISTS idx_{col} ON {self.tableName} ({self._quote(col)})')
+
+    def _sqlType(self, series:pd.Series):
+        '''Declared types are used to restore the dtypes when reading'''
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return 'TIMESTAMP'
+        if pd.api.types.is_integer_dtype(series):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(series):
+            return 'REAL'
+        return 'TEXT'
+
+    def _toRows(self, df:pd.DataFrame):
+        '''It converts the dataframe into tuples of plain Python values. Missing values become NULL'''
+        auxDf = df.copy()
+        for col in auxDf.columns:
+            if pd.api.types.is_datetime64_any_dtype(auxDf[col]):
+                auxDf[col] = auxDf[col].dt.strftime(self.dateFormat)
+        auxDf = auxDf.astype(object).where(auxDf.notna(), None)
+        return auxDf.itertuples(index=False, name=None)
+
+    def _restoreTypes(self, df:pd.DataFrame):
+        declared = {row[1]: row[2] for row in self.connection.execute(f'PRAGMA table_info({self.tableName})')}
+        for col in df.columns:
+            sqlType = declared.get(col)
+            if sqlType == 'TIMESTAMP':
+                df[col] = pd.to_datetime(df[col], format=self.dateFormat)
+            elif sqlType == 'INTEGER':
+                df[col] = pd.to_numeric(df[col]).astype('Int64')
+            elif sqlType == 'REAL':
+                df[col] = pd.to_numeric(df[col])
+            else:
+                df[col] = df[col].astype('string')
+        return df
+
+    def _quote(self, name:str):
+        return '"' + name.replace('"', '""') + '"'
@@ -1,23 +1,82 @@
-import calendar
+import hashlib
 import json
-import matplotlib.pyplot as plt
+import matplotlib
+from matplotlib.figure import Figure
+import numpy as np
 import pandas as pd
 import os
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen.canvas import Canvas
+from reportlab.lib import colors
+from reportlab.platypus import Table, TableStyle
+from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Drawing
 from PIL import Image
+from io import BytesIO
 from datetime import date
+from Store import Store
+from Config import Config
+from Progress import Progress
+from Profiler import Profiler
+from Cache import Cache
+from Assets import Assets
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain
+
+try:
+    from svglib.svglib import svg2rlg
+    hasSvglib = True
+except ImportError:
+    hasSvglib = False
 
 class Visualiser:
     detailsFile = 'tools/details.json'
-    resourcesDirectory = 'resources'
-    overviewDirectory = os.path.join(resourcesDirectory, 'general')
+    logosDirectory = 'tools/logos'
+    overviewSection = 'general'
+    tableLength = 100
+    statusTags = ['Open', 'Closed', 'Unknown']
+    statsKeys = ['period', 'inRange', 'priority', 'resolution', 'issue type', 'ticket source', 'first time fix']
+    trailingPeriods = 12 # Months drawn by the annual graph, ending with the month of the report end date
+    tableColors = {'header': '#F2F2F2', 'withinTarget': '#ADDFFF', 'breached': '#FCD299'}
     pageCount = 1
     
-    def __init__(self):
+    def __init__(self, workers:int = 1, vector:bool = False, nativeTables:bool = True, progress:Progress = None, profiler:Profiler = None, renderCache:Cache = None):
+        '''
+        Args:
+            workers: Number of processes used to render the figures. 1 renders them in the current process.
+            vector: Embed the charts and tables as vector drawings instead of PNG images. It requires svglib.
+            nativeTables: Write the ticket tables as reportlab tables that paginate on their own, instead of matplotlib images of 100 rows.
+            progress: Receives the charts rendered and the pages written, and stops the run when it is cancelled.
+            profiler: Records the time, memory and rows of every stage of the run.
+            renderCache: Keeps the rendered charts, so a rerun only renders those whose data or styling changed.
+        '''
+        self.workers = workers
+        self.progress = progress or Progress()
+        self.profiler = profiler or Profiler(enabled=False)
+        self.nativeTables = nativeTables
+        if vector and not hasSvglib:
+            print("[Visualiser]: svglib is not installed, the charts will be embedded as PNG images")
+        self.vector = vector and hasSvglib
+        self.imageFormat = 'svg' if self.vector else 'png'
+        self.artifacts = {}
+        self.tables = {}
+        self.tablePages = {}
+        self._figures = {}
+        self._pool = None
+        self.renderCache = renderCache
+        self._styleDigest = None
         self._loadConfiguration()
 
-    def run(self, df:pd.DataFrame, startDate, endDate, outputFileName:str, fileTitle: str, author: str, client: str):
+    def run(self, df:pd.DataFrame, startDate, endDate, outputFileName:str, fileTitle: str, author: str, client: str, totals:pd.DataFrame = None):
+        '''
+        It builds the report of the tickets of @df between @startDate and @endDate and writes it to @outputFileName.
+
+        Args:
+            totals: Tickets, SLA sums and first time fixes by priority for the time graph, when @df only holds a window of the history (see Store.priorityTotals).
+                    By default they are computed from @df.
+        '''
+        self._loadConfiguration()
         self.fileTitle = fileTitle
         self.author = author
         self.client = client
@@ -25,85 +84,226 @@ class Visualiser:
         self.startDateLong = startDate.strftime('%d/%m/%Y')
         self.endDateLong = endDate.strftime('%d/%m/%Y')
         self.startDateShort = startDate.strftime('%d/%m/%y')
+        self.endDate = endDate
         self.endDateShort = endDate.strftime('%d/%m/%y')
-        df.columns = df.columns.str.lower()
-        df['created'] = pd.to_datetime(df['created'],format='mixed')
-        df['updated'] = pd.to_datetime(df['updated'],format='mixed')
-        self.filteredDf = df[(df['created'] >= startDate) & (df['created'] <= endDate)]
-        self.populateResources(df)
-        self.generatePDF(outputFileName)
+        self.pageCount = 1
+        self.artifacts = {}
+        self.tables = {}
+        self.tablePages = {}
+        with self.profiler.stage('run', rows=len(df)):
+            df.columns = df.columns.str.lower()
+            for col in ['created', 'updated']:
+                if not pd.api.types.is_datetime64_any_dtype(df[col]): # Formatted dataframes are parsed once by the Handler
+                    df[col] = pd.to_datetime(df[col],format='mixed')
+            inRange = (df['created'] >= startDate) & (df['created'] <= endDate)
+            self.filteredDf = df[inRange]
+            with self.profiler.stage('_aggregate', rows=len(df)) as record:
+                self.stats = self._aggregate(df, inRange)
+                record['groups'] = len(self.stats) # Kept apart from the rows, which are those of @df as in every other stage
+            self.priorityTotals = self._priorityTotals(self.stats) if totals is None else self._sumByPriority(totals)
+            try:
+                self.populateResources(df)
+                self.generatePDF(outputFileName)
+            finally:
+                self._closePool() # Also when the run fails or is cancelled before the PDF is written
+
+    def runStore(self, store:Store, startDate, endDate, outputFileName:str, fileTitle: str, author: str, client: str, filters:dict = None):
+        '''
+        It runs the report on the tickets kept in a Store instead of a whole dataframe.
+        Only the tickets of the months drawn by the annual graph, those created between the dates selected and those still open are read, using the indexes of the store.
+        The time graph covers the whole history, as it does for a dataframe, from totals added up by the store.
+        '''
+        df = store.query(self.windowStart(startDate, endDate), self.windowEnd(endDate), includeOpen=True, filters=filters)
+        self.run(df, startDate, endDate, outputFileName, fileTitle, author, client, totals=store.priorityTotals(filters))
+
+    @classmethod
+    def windowStart(cls, startDate, endDate):
+        '''It returns the first date a report between @startDate and @endDate reads tickets from'''
+        return min(startDate, (pd.Period(endDate, 'M') - (cls.trailingPeriods - 1)).start_time)
+
+    @classmethod
+    def windowEnd(cls, endDate):
+        '''It returns the last date a report ending on @endDate reads tickets until. The annual graph draws the whole month of @endDate'''
+        return pd.Period(endDate, 'M').end_time
 
     def populateResources(self, df:pd.DataFrame):
         '''
-        It creates all of the resources and place them in the correspondent directory.
+        It renders all of the charts and keeps them in memory, in the artifacts of their section.
+        The charts are drawn from the aggregated statistics. The tables are only prepared, their pages are produced one at a time by generatePDF.
         - Overview uses a dataframe that contains all tickets.
         - Priority uses a filtered dataframe, limited by the dates chosen when it was created.
         '''
-        # OVERVIEW
-        annualGraph = self._generateAnnualGraph(self._splitMonths(df))
-        self._savePlt(annualGraph,self.overviewDirectory,'annualGraph')
-        timeGraph = self._generateTimeGraph(df)
-        self._savePlt(timeGraph,self.overviewDirectory,'timeGraph')
-        openTickets = df[df['resolution'] == 'Open']
-        if not openTickets.empty: # TODO: Complete else
-            self._generateTicketTable(openTickets, self.overviewDirectory, 'openTable', isOverview= True)
-        else:
-            print("No tickets to generate table for Overview")
-
-        # PRIORITY
-        priorityDfs, pStatusList = self._splitPriorities(self.filteredDf)
-        tags = ['Open', 'Closed', 'Unknown']
-        for priority, label, status in zip(priorityDfs, self.priorityLabels, pStatusList):
-            labelDir = os.path.join(self.resourcesDirectory,label)
-            if not priority.empty:
-                statusLabel = [f"{tag} ({count})" for tag, count in zip(tags, status)]
-                statusPie = self._generatePie(plt, status, statusLabel)
-                self._savePlt(statusPie, labelDir, 'statusPie')
-                typesPie = self._generateTypesPie(priority)
-                self._savePlt(typesPie, labelDir, 'typesPie')
-                self._generateTicketTable(priority, labelDir, 'ticketTable', isOverview=False) if not priority.empty else print(f"No tickets to generate table {label}")
+        with self.profiler.stage('populateResources', rows=len(df)):
+            # OVERVIEW
+            jobs = [('_generateAnnualGraph', (self._trailingWindow(self._periodStatus(self.stats), self.endDate),), self.overviewSection, 'annualGraph'),
+                    ('_generateTimeGraph', (self.priorityTotals,), self.overviewSection, 'timeGraph')]
+            openTickets = df[df['resolution'] == 'Open']
+            if not openTickets.empty: # TODO: Complete else
+                self._generateTicketTable(openTickets, self.overviewSection, 'openTable', isOverview= True)
             else:
-                print(f"No tickets to generate graph for {label}")
+                print("No tickets to generate table for Overview")
+
+            # PRIORITY
+            inRangeStats = self.stats[self.stats['inRange']]
+            priorityStatus = self._priorityStatus(inRangeStats)
+            priorityDfs = dict(list(self.filteredDf.groupby('priority', observed=True, sort=False)))
+            for label in self.priorityLabels:
+                if priorityStatus.loc[label].sum() > 0:
+                    labelStats = inRangeStats[inRangeStats['priority'] == label]
+                    jobs.append(('_generateStatusPie', (priorityStatus.loc[label].tolist(),), label, 'statusPie'))
+                    jobs.append(('_generateTypesPie', (self._countBy(labelStats, 'issue type'), self._countBy(labelStats, 'ticket source')), label, 'typesPie'))
+                    self._generateTicketTable(priorityDfs[label], label, 'ticketTable', isOverview=False)
+                else:
+                    print(f"No tickets to generate graph for {label}")
+            self._renderJobs(jobs)
 
     def generatePDF(self, outputFileName:str):
-        '''It creates the pdf canvas and stores it in the given outputFileName'''
-        reportPDF = Canvas(f'{outputFileName}.pdf', pagesize=A4)
-        reportPDF.setTitle(self.fileTitle)
-
-        # COVER SHEET
-        imgSet = []
-        clientImg = f'{self.client}.png'
-        imgSet.append(self._fetchImages('tools/logos',['theICEway.png',clientImg]))
-        reportPDF = self._populatePDF(pdfCanvas= reportPDF, title= self.fileTitle, isCover=True, imgSet= imgSet)
-        # OVERVIEW
-        imgSet = []
-        imgSet.append(self._fetchImages(self.overviewDirectory,['annualGraph.png','timeGraph.png']))
-        tblImgs = self._fetchImages(self.overviewDirectory,conditionStr='Table')
-        for tbl in tblImgs:
-            imgSet.append([tbl])
-        reportPDF = self._populatePDF(pdfCanvas= reportPDF, title= 'MONTHLY TICKETS', isCover= False, imgSet= imgSet)
+        '''
+        It creates the pdf canvas and stores it in the given outputFileName.
+        Table pages are produced one at a time and released once written, so the memory used does not depend on the number of tickets.
+        The process pool of the report is shut down once the PDF is written.
+        '''
+        with self.profiler.stage('generatePDF'):
+            reportPDF = Canvas(f'{outputFileName}.pdf', pagesize=A4)
+            reportPDF.setTitle(self.fileTitle)
+
+            # COVER SHEET
+            imgSet = []
+            clientImg = f'{self.client}.png'
+            imgSet.append(self._fetchLogos(['theICEway.png',clientImg]))
+            reportPDF = self._populatePDF(pdfCanvas= reportPDF, title= self.fileTitle, isCover=True, imgSet= imgSet)
+            # OVERVIEW
+            imgSet = []
+            imgSet.append(self._fetchImages(self.overviewSection,['annualGraph','timeGraph']))
+            imgSet = chain(imgSet, self._tablePageImages(self.overviewSection)) # Table pages are rendered as they are written
+            reportPDF = self._populatePDF(pdfCanvas= reportPDF, title= 'MONTHLY TICKETS', isCover= False, imgSet= imgSet)
+            self._populateTable(reportPDF, self.overviewSection)
         
-        # PRIORITY
-        priorityDfs, _ = self._splitPriorities(self.filteredDf) #TODO: Change method to have a single return if wanted
-        for priority, label in zip(priorityDfs, self.priorityLabels):
-            if not priority.empty:
-                imgSet = []
-                labelDir = os.path.join(self.resourcesDirectory, label)
-                imgSet.append(self._fetchImages(labelDir,['statusPie.png','typesPie.png']))
-                tblImgs = self._fetchImages(labelDir,conditionStr='Table')
-                for tbl in tblImgs:
-                    imgSet.append([tbl]) # append table images separetely
-                reportPDF = self._populatePDF(pdfCanvas= reportPDF, title= f"{label} - {len(priority)} tickets", isCover= False, imgSet= imgSet)
-        reportPDF.save()
+            # PRIORITY
+            priorityCounts = self._priorityStatus(self.stats[self.stats['inRange']]).sum(axis=1)
+            for label in self.priorityLabels:
+                if priorityCounts[label] > 0:
+                    imgSet = []
+                    imgSet.append(self._fetchImages(label,['statusPie','typesPie']))
+                    imgSet = chain(imgSet, self._tablePageImages(label))
+                    reportPDF = self._populatePDF(pdfCanvas= reportPDF, title= f"{label} - {priorityCounts[label]} tickets", isCover= False, imgSet= imgSet)
+                    self._populateTable(reportPDF, label)
+            reportPDF.save()
+        self._closePool()
 
 # PRIVATE METHODS
     def _loadConfiguration(self):
-        with open(self.detailsFile, 'r') as file:
-            data = json.load(file)
-            self.responseAgreed = data['SLAresponse']
-            self.resolutionAgreed = data['SLAresolution']
-            self.priorityLabels = data['priorityLabels']
-            self.colorsICE = data['colorsICE']
+        '''It takes the settings from the shared configuration. It is called before every report, so SLA changes apply without a restart'''
+        data = Config.load(self.detailsFile)
+        if data is getattr(self, 'config', None):
+            return
+        self.config = data
+        self._styleDigest = None # The charts cached with the previous settings no longer apply
+        self.responseAgreed = data.responseTargets
+        self.resolutionAgreed = data.resolutionTargets
+        self.priorityLabels = data['priorityLabels']
+        self.colorsICE = data['colorsICE']
+
+    def _renderJobs(self, jobs:list):
+        '''It renders every figure job and stores the results in the artifacts. Each job is a tuple (generator method, arguments, section, name)'''
+        with self.profiler.stage('_renderJobs', rows=len(jobs)):
+            for (_, _, section, name), artifact in self._iterRenderJobs(jobs, len(jobs), self._renderPool()):
+                if artifact:
+                    self.artifacts.setdefault(section, {})[name] = artifact
+
+    def _renderPool(self):
+        '''It returns the process pool the figures of the report are rendered on, started the first time it is needed. None with a single worker'''
+        if self.workers > 1 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers= self.workers, initializer= _initWorker, initargs= (self.vector, self.profiler.enabled))
+        return self._pool
+
+    def _closePool(self):
+        '''It shuts the process pool of the report down, dropping the jobs not started yet'''
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _iterRenderJobs(self, jobs, total:int, pool:ProcessPoolExecutor = None):
+        '''
+        It renders the figure jobs of the iterable @jobs and yields each job with its artifact, in order, so the caller can use and release one before the next.
+        Jobs are independent from each other, so they are spread over the process @pool when one is given.
+        Only a few jobs per worker are submitted ahead, so the memory does not grow with the number of jobs.
+        With a render cache, a job whose data and styling were already rendered reuses the stored chart instead.
+        '''
+        extension = f'.{self.imageFormat}'
+        useCache = self.renderCache is not None and self.renderCache.enabled
+        lookahead = 2 * self.workers if pool else 0
+        window, done, reused, stored = deque(), 0, 0, False
+        def release():
+            '''It returns the oldest job of the window with its artifact, storing the artifacts rendered in the cache'''
+            nonlocal done, stored
+            job, key, artifact, rendered = window.popleft()
+            if isinstance(artifact, Future):
+                artifact, records = artifact.result()
+                self.profiler.merge(records) # Stages timed in the worker
+            if rendered and key:
+                self.renderCache.storeBytes(key, artifact, extension)
+                stored = True
+            done = done + 1
+            self.progress.update('Charts rendered', done, total)
+            return job, artifact
+        try:
+            for job in jobs:
+                key = self._jobKey(job) if useCache else None
+                artifact = self.renderCache.loadBytes(key, extension) if key else None
+                rendered = artifact is None
+                if not rendered:
+                    reused = reused + 1
+                elif pool:
+                    artifact = pool.submit(_renderJob, job)
+                else:
+                    artifact = self._renderJob(job)
+                window.append((job, key, artifact, rendered))
+                while len(window) > lookahead:
+                    yield release()
+            while window:
+                yield release()
+        finally:
+            for _, _, artifact, _ in window: # Jobs left when the caller stops early or the run is cancelled
+                if isinstance(artifact, Future):
+                    artifact.cancel()
+        if reused:
+            print(f"[Visualiser]: {reused} of {total} charts reused from the render cache")
+        if stored:
+            self.renderCache.evict()
+
+    def _jobKey(self, job:tuple):
+        '''It hashes the generator and the data of a job together with the styling, so the key only changes when the chart would'''
+        methodName, args, _, _ = job
+        digest = hashlib.sha256(self._styleKey())
+        digest.update(methodName.encode())
+        for arg in args:
+            if isinstance(arg, (pd.DataFrame, pd.Series)):
+                digest.update(repr(list(arg.columns) if isinstance(arg, pd.DataFrame) else arg.name).encode())
+                digest.update(pd.util.hash_pandas_object(arg).to_numpy().tobytes())
+            else:
+                digest.update(repr(arg).encode())
+        return digest.hexdigest()
+
+    def _styleKey(self):
+        '''It hashes everything besides the data that changes how a chart looks: the configuration, the output format and the code drawing it'''
+        if self._styleDigest is None:
+            with open(__file__, 'rb') as file:
+                source = file.read()
+            style = {'colorsICE': self.colorsICE, 'priorityLabels': self.priorityLabels, 'responseAgreed': self.responseAgreed,
+                     'resolutionAgreed': self.resolutionAgreed, 'tableColors': self.tableColors, 'statusTags': self.statusTags,
+                     'imageFormat': self.imageFormat, 'matplotlib': matplotlib.__version__, 'source': hashlib.sha256(source).hexdigest()}
+            self._styleDigest = hashlib.sha256(json.dumps(style, sort_keys=True).encode()).digest()
+        return self._styleDigest
+
+    def _renderJob(self, job:tuple):
+        methodName, args, _, name = job
+        with self.profiler.stage(methodName):
+            figure = getattr(self, methodName)(*args)
+            try:
+                return self._savePlt(figure, name)
+            finally:
+                figure.clear() # The artists of the chart are released as soon as it is rendered
 
     def _populatePDF(self, pdfCanvas:Canvas, title:str, isCover: bool, imgSet:list):
         '''
@@ -148,40 +348,154 @@ class Visualiser:
                     imgWid, imgHei = self._resizeImg(img, widthLimit= canvasSize[0] - margins[0])          
                 yCoord = yCoord - yPad - imgHei
                 xCoord = canvasSize[0]/2 - imgWid/2
-                pdfCanvas.drawInlineImage(img, x= xCoord, y= yCoord, width= imgWid, height= imgHei)
-
-            # FOOTER
-            yFooter = 30
-            pdfCanvas.setFont('Helvetica', 12)
-            todayWidth = pdfCanvas.stringWidth(self.today)
-            pdfCanvas.drawString(x= 30, y= yFooter, text= self.author)
-            pdfCanvas.drawString(x= canvasSize[0]/2, y= yFooter, text= str(self.pageCount))
-            pdfCanvas.drawString(x= canvasSize[0] - 30 - todayWidth, y= yFooter, text= self.today)
-
-            pdfCanvas.showPage()
-            self.pageCount = self.pageCount + 1
+                self._drawImage(pdfCanvas, img, x= xCoord, y= yCoord, width= imgWid, height= imgHei)
+
+            self._closePage(pdfCanvas)
             yCoord = canvasSize[1]
         return pdfCanvas
 
-    def _splitPriorities(self, df:pd.DataFrame):
-        '''It splits the dataframe provided into its priorities. It returns the dataframes holding tickets based on their priority and the count of each status in them'''
-        priorityDfs = []
-        pStatusList = []
-        for label in self.priorityLabels:
-            priorityDfs.append(df[df['priority'].isin([label])])
-        for auxDf in priorityDfs:
-            pStatusList.append([len(auxDf[auxDf['resolution'] == 'Open']), len(auxDf[auxDf['resolution'] == 'Closed']), len(auxDf[auxDf['resolution'] == 'Unknown'])])
-        
-        return priorityDfs, pStatusList
+    def _populateTable(self, pdfCanvas:Canvas, section:str):
+        '''
+        It writes the native ticket table of the @section, if any, over as many pages as needed.
+        Each page is built from its own rows only, written and released before the next one, so long tables take neither memory nor time per page proportional to their length.
+        '''
+        if section not in self.tables:
+            return
+        df, colLabels, breached, colWidths = self.tables[section]
+        with self.profiler.stage('_populateTable', rows=len(df)):
+            margins = [30, 30]
+            yFooter = 50 # Space kept free for the footer
+            canvasSize = [pdfCanvas._pagesize[0], pdfCanvas._pagesize[1]]
+            availWidth = canvasSize[0] - 2*margins[0]
+            availHeight = canvasSize[1] - margins[1] - yFooter
+            colWidths = [width * availWidth for width in colWidths]
 
-    def _splitMonths(self, df:pd.DataFrame):
-        '''It returns a list containing 12 dataframes, each containing the tickets created in each month'''
-        monthly_dfs = [df[df['created'].dt.month == month] for month in range(1, 13)]
-        return monthly_dfs
-    
-    def _resizeImg(self, img: Image, widthLimit: int, heightLimit=None):
+            rowsPerPage = self._rowsPerPage(pdfCanvas, df, colLabels, breached, colWidths, availWidth, availHeight)
+            start = 0
+            while start < len(df):
+                with self.profiler.stage('_tablePage', rows=rowsPerPage) as record:
+                    table = self._tablePage(df[start:start + rowsPerPage], colLabels, breached[start:start + rowsPerPage], colWidths)
+                    _, tableHeight = table.wrapOn(pdfCanvas, availWidth, availHeight)
+                    count = min(rowsPerPage, len(df) - start)
+                    if tableHeight > availHeight:
+                        # Some rows are taller than the ones measured: the heights of this wrap tell how many of them fit, so the page is built once more
+                        bottoms = np.cumsum(table._rowHeights)
+                        count = max(int(np.searchsorted(bottoms, availHeight + 1e-6, side='right')) - 1, 1)
+                        table = self._tablePage(df[start:start + count], colLabels, breached[start:start + count], colWidths)
+                        _, tableHeight = table.wrapOn(pdfCanvas, availWidth, availHeight)
+                    table.drawOn(pdfCanvas, margins[0], canvasSize[1] - margins[1] - tableHeight)
+                    self._closePage(pdfCanvas)
+                    record['rows'] = count
+                start = start + count
+
+    def _rowsPerPage(self, pdfCanvas:Canvas, df:pd.DataFrame, colLabels:list, breached, colWidths:list, availWidth:float, availHeight:float):
+        '''It measures the header and the first rows of a table to know how many rows fit in a page'''
+        sample = min(len(df), 50)
+        oneRow = self._tablePage(df[:1], colLabels, breached[:1], colWidths).wrapOn(pdfCanvas, availWidth, availHeight)[1]
+        if sample < 2:
+            return 1
+        sampleRows = self._tablePage(df[:sample], colLabels, breached[:sample], colWidths).wrapOn(pdfCanvas, availWidth, availHeight)[1]
+        rowHeight = (sampleRows - oneRow) / (sample - 1)
+        headerHeight = oneRow - rowHeight
+        return max(int((availHeight - headerHeight) / rowHeight + 1e-6), 1)
+
+    def _tablePage(self, df:pd.DataFrame, colLabels:list, breached, colWidths:list):
+        '''It builds the table of one page: the header and the rows of @df, with the breached tickets highlighted'''
+        auxDf = df.copy()
+        auxDf['created'] = auxDf['created'].dt.strftime('%d/%m/%y')
+        auxDf['updated'] = auxDf['updated'].dt.strftime('%d/%m/%y')
+        rows = [colLabels] + auxDf.astype(object).where(auxDf.notna(), '').astype(str).values.tolist()
+        table = Table(rows, colWidths= colWidths)
+        style = [('FONT', (0, 0), (-1, -1), 'Helvetica', 6),
+                 ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 6),
+                 ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
+                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(self.tableColors['header'])),
+                 ('BACKGROUND', (0, 1), (0, -1), colors.HexColor(self.tableColors['withinTarget'])),
+                 ('TOPPADDING', (0, 0), (-1, -1), 1),
+                 ('BOTTOMPADDING', (0, 0), (-1, -1), 1)]
+        style += [('BACKGROUND', (0, row), (0, row), colors.HexColor(self.tableColors['breached'])) for row in np.flatnonzero(breached) + 1]
+        table.setStyle(TableStyle(style))
+        return table
+
+    def _closePage(self, pdfCanvas:Canvas):
+        '''It draws the footer and starts a new page'''
+        canvasSize = [pdfCanvas._pagesize[0], pdfCanvas._pagesize[1]]
+        yFooter = 30
+        pdfCanvas.setFont('Helvetica', 12)
+        todayWidth = pdfCanvas.stringWidth(self.today)
+        pdfCanvas.drawString(x= 30, y= yFooter, text= self.author)
+        pdfCanvas.drawString(x= canvasSize[0]/2, y= yFooter, text= str(self.pageCount))
+        pdfCanvas.drawString(x= canvasSize[0] - 30 - todayWidth, y= yFooter, text= self.today)
+
+        pdfCanvas.showPage()
+        self.progress.update('Pages written', self.pageCount)
+        self.pageCount = self.pageCount + 1
+
+    def _aggregate(self, df:pd.DataFrame, inRange:pd.Series):
+        '''
+        It computes, in a single group-by, the ticket counts and SLA sums the report needs.
+        Tickets are grouped by calendar month (year and month), priority, resolution, issue type, ticket source, first time fix and whether they were created within the report dates.
+        Every chart reads from the result instead of filtering the dataframe again.
+        '''
+        keys = df[self.statsKeys[2:]].assign(period= df['created'].dt.to_period('M'), inRange= inRange)
+        values = df[['actual response', 'actual resolution']].apply(pd.to_numeric, errors='coerce').astype('Int64') # Sums do not fit narrow integers
+        grouped = pd.concat([keys, values], axis=1).groupby(self.statsKeys, dropna=False, observed=True)
+        stats = grouped.agg(count= ('actual resolution', 'size'), responseSum= ('actual response', 'sum'), resolutionSum= ('actual resolution', 'sum'))
+        return stats.reset_index()
+
+    def _periodStatus(self, stats:pd.DataFrame):
+        '''It returns the number of tickets of each status (columns) created in each calendar month (rows), from the first month to the last one'''
+        counts = stats.groupby(['period', 'resolution'], observed=True)['count'].sum().unstack(fill_value=0)
+        if not counts.empty:
+            counts = counts.reindex(pd.period_range(counts.index.min(), counts.index.max(), freq=counts.index.freq), fill_value=0)
+        return counts.reindex(columns=self.statusTags, fill_value=0)
+
+    def _trailingWindow(self, counts:pd.DataFrame, endDate, periods:int = None):
+        '''It returns the @periods rows of @counts ending with the period of @endDate. Periods without tickets are filled with 0'''
+        end = pd.Period(endDate, freq=counts.index.freq if isinstance(counts.index, pd.PeriodIndex) else 'M')
+        return counts.reindex(pd.period_range(end=end, periods=periods or self.trailingPeriods), fill_value=0)
+
+    def _priorityStatus(self, stats:pd.DataFrame):
+        '''It returns the number of tickets of each status (columns) in each priority (rows)'''
+        counts = stats.groupby(['priority', 'resolution'], observed=True)['count'].sum().unstack(fill_value=0)
+        return counts.reindex(index=self.priorityLabels, columns=self.statusTags, fill_value=0)
+
+    def _priorityTotals(self, stats:pd.DataFrame):
+        '''It returns the tickets, SLA sums and first time fixes of each priority'''
+        stats = stats.assign(firstFix= stats['count'].where(stats['first time fix'] == 'Yes', 0))
+        return self._sumByPriority(stats)
+
+    def _sumByPriority(self, totals:pd.DataFrame):
+        '''It adds up the tickets, SLA sums and first time fixes of the rows of each priority'''
+        totals = totals.groupby('priority', observed=True)[['count', 'responseSum', 'resolutionSum', 'firstFix']].sum()
+        return totals.reindex(index=self.priorityLabels, fill_value=0)
+
+    def _countBy(self, stats:pd.DataFrame, column:str):
+        '''It returns the number of tickets of each value of the @column, most common first'''
+        counts = stats.groupby(column, observed=True)['count'].sum()
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def _imageSize(self, img):
+        '''It returns the size of a PIL image or of a reportlab drawing'''
+        return (img.width, img.height) if isinstance(img, Drawing) else img.size
+
+    def _drawImage(self, pdfCanvas:Canvas, img, x:float, y:float, width:float, height:float):
+        '''It draws a PIL image or a reportlab drawing, scaled to the given size'''
+        if isinstance(img, Drawing):
+            pdfCanvas.saveState()
+            pdfCanvas.translate(x, y)
+            pdfCanvas.scale(width / img.width, height / img.height)
+            renderPDF.draw(img, pdfCanvas, 0, 0)
+            pdfCanvas.restoreState()
+        elif Assets.isAsset(img): # Logos are downscaled once and embedded as a shared image
+            pdfCanvas.drawImage(Assets.reader(img, width, height), x= x, y= y, width= width, height= height, mask= 'auto')
+        else:
+            pdfCanvas.drawInlineImage(img, x= x, y= y, width= width, height= height)
+
+    def _resizeImg(self, img, widthLimit: int, heightLimit=None):
         '''It resizes an image while maintaining its aspect ratio, ensuring that the resulting dimensions fit within the limits.'''
-        imgRatio = img.size[0] / img.size[1]
+        imgSize = self._imageSize(img)
+        imgRatio = imgSize[0] / imgSize[1]
         imgWidth = widthLimit
         imgHeight = imgWidth / imgRatio
         if heightLimit and imgWidth > widthLimit:
@@ -192,73 +506,125 @@ class Visualiser:
             imgWidth = imgHeight * imgRatio
         return imgWidth, imgHeight
 
-    def _fetchImages(self, directory:str, fileNames = None, conditionStr = None): 
-        '''It opens the files located at the @inputDir that match the conditions.
+    def _fetchImages(self, section:str, fileNames = None, conditionStr = None): 
+        '''It opens the images rendered for the @section that match the conditions.
         @fileNames: It searches for exact matches. It accepts lists of names.
-        @conditionStr: It searches for files containing the conditionStr in its name.
+        @conditionStr: It searches for images containing the conditionStr in its name. They are returned in the order they were rendered.
         '''
-        imgs = []
+        artifacts = self.artifacts.get(section, {})
         if fileNames:
-            files = fileNames
+            names = fileNames
         elif conditionStr:
-            files = [f for f in os.listdir(directory) if conditionStr.lower() in f.lower()]
+            names = [name for name in artifacts if conditionStr.lower() in name.lower()]
         else:
             print('[_fetchImages]: No parameters were provided')
             return None
 
-        for imgName in files:
+        imgs = []
+        for name in names:
+            if name in artifacts:
+                imgs.append(self._openArtifact(artifacts[name]))
+            else:
+                print(f"[_fetchImages]: The image {section}/{name} was not rendered")
+        return imgs
+
+    def _openArtifact(self, artifact:bytes):
+        '''It decodes a rendered artifact into a drawing or an image, depending on the image format'''
+        return svg2rlg(BytesIO(artifact)) if self.vector else Image.open(BytesIO(artifact))
+
+    def _tablePageImages(self, section:str):
+        '''It renders the table pages of the @section one at a time, and yields each of them as a page of images'''
+        if section not in self.tablePages:
+            return
+        df, isOverview, fileName = self.tablePages[section]
+        starts = range(0, len(df), self.tableLength)
+        jobs = (('_generateTablePage', (df[start:start + self.tableLength].reset_index(drop=True), isOverview), section, f"{fileName}{index}")
+                for index, start in enumerate(starts, start=1))
+        for _, artifact in self._iterRenderJobs(jobs, len(starts), self._renderPool()):
+            if artifact:
+                yield [self._openArtifact(artifact)]
+
+    def _fetchLogos(self, fileNames:list):
+        '''It returns the logos stored in the @logosDirectory, decoded once per process. Missing logos are skipped'''
+        imgs = []
+        for imgName in fileNames:
+            fileName = os.path.join(self.logosDirectory, imgName)
             try:
-                fileName = os.path.join(directory, imgName)
-                imgs.append(Image.open(fileName))
-            except:
-                print(f"[_fetchImages]: The file {fileName} was not found")
-                return None
+                imgs.append(Assets.image(fileName))
+            except OSError:
+                print(f"[_fetchLogos]: The file {fileName} was not found")
         return imgs
     
-    def _savePlt(self,plt, directoryName:str, fileName:str):
-        '''It saves the figure as a PNG file in the directory provided. This directory must be inside the 'resources' directory'''
+    def _figure(self, figsize:tuple = None):
+        '''
+        It returns an empty figure of the given size. Figures are kept in a pool, one per size, and cleared before they are reused.
+        They are not registered with pyplot, so no figure outlives the Visualiser.
+        '''
+        figure = self._figures.get(figsize)
+        if figure is None:
+            figure = self._figures[figsize] = Figure(figsize=figsize)
+        else:
+            figure.clear()
+            figure.subplots_adjust(**{param: matplotlib.rcParams[f'figure.subplot.{param}'] for param in ['left', 'bottom', 'right', 'top', 'wspace', 'hspace']}) # Undo tight_layout
+        return figure
+
+    def _savePlt(self, figure:Figure, fileName:str):
+        '''It renders the figure as PNG (or SVG in vector mode) and returns its bytes'''
         try:
-            pngFilepath = os.path.join(directoryName, fileName)
-            plt.savefig(pngFilepath, bbox_inches='tight')
-            plt.figure()  # Clear current figure
-            print(f"The graph {fileName} has been succesfully saved as {pngFilepath}")
+            buffer = BytesIO()
+            with matplotlib.rc_context({'svg.fonttype': 'none'}): # Text stays as text in vector mode
+                figure.savefig(buffer, format=self.imageFormat, bbox_inches='tight')
+            print(f"The graph {fileName} has been succesfully rendered")
+            return buffer.getvalue()
         except:
-            print(f"[_savePlt]: The graph {fileName} could not be saved")
+            print(f"[_savePlt]: The graph {fileName} could not be rendered")
         
-    def _generatePie(self, plt, values:list, labels:list):
+    def _generatePie(self, ax, values:list, labels:list):
         if len(values)>0:
             values = values[:6]
-            plt.pie(values, colors = self.colorsICE,startangle=90, counterclock=False)
-            plt.legend(labels, bbox_to_anchor=(1, 1), loc='upper left')
-            return plt
+            ax.pie(values, colors = self.colorsICE,startangle=90, counterclock=False)
+            ax.legend(labels, bbox_to_anchor=(1, 1), loc='upper left')
+            return ax
     
-    def _generateAnnualGraph(self, dfsList:list[pd.DataFrame]):
-        closedDf, openDf, auxDf, unknownDf = [], [], [], []
-        months = calendar.month_abbr[1:]
-        for monthDf in dfsList:
-            closedTickets = len(monthDf[monthDf['resolution'] == 'Closed'])
-            openTickets = len(monthDf[monthDf['resolution'] == 'Open'])
-            closedDf.append(closedTickets)
-            openDf.append(openTickets)
-            auxDf.append(closedTickets + openTickets)
-            unknownDf.append(len(monthDf[monthDf['resolution'] == 'Unknown']))
-        plt.bar(months, closedDf, color= self.colorsICE[1], label= f"Closed ({sum(closedDf)})")
-        plt.bar(months, openDf, bottom= closedDf, color= self.colorsICE[0], label=f"Open ({sum(openDf)})")
-        plt.bar(months, unknownDf, bottom= auxDf, color= self.colorsICE[2], label= f"Unknown ({sum(unknownDf)})")
-        plt.ylabel('N tickets')
-        plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-        return plt
-
-    def _generateTicketTable(self, df: pd.DataFrame, directoryName:str, fileName:str, isOverview: bool):
-        def colorTable(df):
-            colors = []
-            for index, row in df.iterrows():
-                if pd.isna(row['actual resolution']) or row['actual resolution'] <= int(self.resolutionAgreed.get(row['priority'])):
-                    colors.append(['#ADDFFF','#FFFFFF','#FFFFFF','#FFFFFF','#FFFFFF','#FFFFFF','#FFFFFF','#FFFFFF'])
-                else:
-                    colors.append(['#FCD299','#FFFFFF','#FFFFFF','#FFFFFF','#FFFFFF','#FFFFFF','#FFFFFF','#FFFFFF'])
-            return colors
-        
+    def _generateStatusPie(self, status:list):
+        tags = ['Open', 'Closed', 'Unknown']
+        statusLabel = [f"{tag} ({count})" for tag, count in zip(tags, status)]
+        figure = self._figure()
+        self._generatePie(figure.subplots(), status, statusLabel)
+        return figure
+
+    def _generateAnnualGraph(self, periodStatus:pd.DataFrame):
+        months = [period.strftime('%b\n%y') for period in periodStatus.index] # Months of different years are never folded together
+        closedDf = periodStatus['Closed'].tolist()
+        openDf = periodStatus['Open'].tolist()
+        unknownDf = periodStatus['Unknown'].tolist()
+        auxDf = [closedTickets + openTickets for closedTickets, openTickets in zip(closedDf, openDf)]
+        figure = self._figure()
+        ax = figure.subplots()
+        ax.bar(months, closedDf, color= self.colorsICE[1], label= f"Closed ({sum(closedDf)})")
+        ax.bar(months, openDf, bottom= closedDf, color= self.colorsICE[0], label=f"Open ({sum(openDf)})")
+        ax.bar(months, unknownDf, bottom= auxDf, color= self.colorsICE[2], label= f"Unknown ({sum(unknownDf)})")
+        ax.set_ylabel('N tickets')
+        ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+        return figure
+
+    def _generateTicketTable(self, df: pd.DataFrame, section:str, fileName:str, isOverview: bool):
+        '''
+        It prepares the ticket table of a section.
+        Native tables are stored in @tables, image tables in @tablePages. generatePDF produces their pages one at a time, image pages holding @tableLength rows.
+        '''
+        with self.profiler.stage('_generateTicketTable', rows=len(df)):
+            df = df.copy()
+            df['summary'] = df['summary'].astype('string').str[:50]
+            df['ticket source'] = df['ticket source'].astype('string').str[:10]
+            if self.nativeTables:
+                cols, colLabels, colWidths = self._tableLayout(isOverview)
+                self.tables[section] = (df[cols], colLabels, self._breachedMask(df), colWidths)
+            else:
+                self.tablePages[section] = (df, isOverview, fileName)
+
+    def _tableLayout(self, isOverview: bool):
+        '''It returns the columns of a ticket table, their labels and their relative widths'''
         if isOverview:
             cols = ['issue key', 'summary', 'priority', 'created', 'updated', 'first time fix', 'in scope', 'ticket source']
         else:
@@ -267,84 +633,101 @@ class Visualiser:
         colLabels[5] = '1st fix'
         colLabels[7] = 'source'
         colWidths = [0.1, 0.4, 0.08, 0.08, 0.07, 0.07, 0.07, 0.09]
-        length = 100
-        limits = [0, length]
+        return cols, colLabels, colWidths
+
+    def _breachedMask(self, df: pd.DataFrame):
+        '''It flags the tickets whose actual resolution exceeds the resolution agreed for their priority'''
+        targets = df['priority'].map(self.resolutionAgreed).astype('Int64')
+        actuals = pd.to_numeric(df['actual resolution'], errors='coerce').astype('Int64')
+        return (actuals > targets).fillna(False).to_numpy(dtype=bool)
+
+    def _generateTablePage(self, df: pd.DataFrame, isOverview: bool):
+        cols, colLabels, colWidths = self._tableLayout(isOverview)
         fontSize = 14
-        index = 1
-
-        df.loc[:,'summary'] = df.loc[:,'summary'].apply(lambda x: x[:50] if isinstance(x, str) else x)
-        df.loc[:,'ticket source'] = df.loc[:,'ticket source'].apply(lambda x: x[:10] if isinstance(x, str) else x)
-
-        while limits[0] <= len(df):
-            auxDf = df[limits[0]:limits[1]]
-            auxDf.loc[:, 'created'] = pd.to_datetime(auxDf['created']).dt.strftime('%d/%m/%y')
-            auxDf.loc[:, 'updated'] = pd.to_datetime(auxDf['updated']).dt.strftime('%d/%m/%y')
-            limits[0] = limits[0] + length
-            limits[1] = limits[1] + length
-            colorTab = colorTable(auxDf)
-
-            _, ax = plt.subplots(figsize=(16, 5))
-            ax.axis('off')
-            table = ax.table(cellText=auxDf[cols].values, colLabels=colLabels, loc='upper center', cellLoc='left', fontsize=fontSize, colWidths=colWidths, cellColours=colorTab)
-            table.auto_set_font_size(False)
-            self._savePlt(plt, directoryName, f"{fileName}{index}")
-            index = index + 1
-
-    def _generateTypesPie(self, df):
-        _, axs = plt.subplots(1, 2, figsize=(12, 6))
-        issues = df['issue type'].value_counts()
-        sources = df['ticket source'].value_counts()
+
+        df = df.copy()
+        df['created'] = df['created'].dt.strftime('%d/%m/%y')
+        df['updated'] = df['updated'].dt.strftime('%d/%m/%y')
+        white = ['#FFFFFF'] * (len(cols) - 1)
+        colorTab = [[self.tableColors['breached' if breached else 'withinTarget']] + white for breached in self._breachedMask(df)]
+
+        figure = self._figure(figsize=(16, 5))
+        ax = figure.subplots()
+        ax.axis('off')
+        table = ax.table(cellText=df[cols].values, colLabels=colLabels, loc='upper center', cellLoc='left', fontsize=fontSize, colWidths=colWidths, cellColours=colorTab)
+        table.auto_set_font_size(False)
+        return figure
+
+    def _generateTypesPie(self, issues:pd.Series, sources:pd.Series):
+        figure = self._figure(figsize=(12, 6))
+        axs = figure.subplots(1, 2)
         self._generatePie(axs[0], issues.values, [f"{issue} ({count})" for issue, count in zip(issues.index, issues.values)])
         self._generatePie(axs[1], sources.values, [f"{source} ({count})" for source, count in zip(sources.index, sources.values)])
-        plt.tight_layout()
-        return plt
+        figure.tight_layout()
+        return figure
     
-    def _generateTimeGraph(self, df:pd.DataFrame):
-        def calculateAvg(df:pd.DataFrame, colName:str):
-            return int(df[colName].sum()) / len(df) if not df.empty else 0 
-
-        def calculatePct(df:pd.DataFrame, colName:str, priorityLabel:str):
-            avg = calculateAvg(df,colName)
-            if colName == 'actual response':
-                timeLimit = int(self.responseAgreed.get(priorityLabel))
+    def _generateTimeGraph(self, priorityTotals:pd.DataFrame):
+        def calculateAvg(totals:pd.Series, colName:str):
+            return int(totals[colName]) / int(totals['count']) if totals['count'] else 0 
+
+        def calculatePct(totals:pd.Series, colName:str, priorityLabel:str):
+            avg = calculateAvg(totals,colName)
+            if colName == 'responseSum':
+                timeLimit = self.responseAgreed[priorityLabel]
                 return avg / timeLimit if avg < timeLimit else 1
-            elif colName == 'actual resolution':
-                timeLimit = int(self.resolutionAgreed.get(priorityLabel))
+            elif colName == 'resolutionSum':
+                timeLimit = self.resolutionAgreed[priorityLabel]
                 return avg / timeLimit if avg < timeLimit else 1
             else: return 0
 
         resolutionsAvg, resolutionPcts, responseAvg, responsePcts, firstFixPcts = [], [], [], [], []
-        priorityDfs, _ = self._splitPriorities(df)
 
-        for priority, label in zip(priorityDfs, self.priorityLabels):
-            resolutionsAvg.append(int(calculateAvg(priority,'actual resolution')))
-            resolutionPcts.append(calculatePct(priority,'actual resolution',label))
-            responseAvg.append(calculateAvg(priority,'actual response'))
-            responsePcts.append(calculatePct(priority,'actual response',label))
-            firstFixPcts.append((priority['first time fix'] == 'Yes').sum() / len(priority))
+        for label in self.priorityLabels:
+            totals = priorityTotals.loc[label]
+            resolutionsAvg.append(int(calculateAvg(totals,'resolutionSum')))
+            resolutionPcts.append(calculatePct(totals,'resolutionSum',label))
+            responseAvg.append(calculateAvg(totals,'responseSum'))
+            responsePcts.append(calculatePct(totals,'responseSum',label))
+            firstFixPcts.append(int(totals['firstFix']) / int(totals['count']) if totals['count'] else 0)
 
         firstFixedResolutions = [round(res * ffr , 2) for res, ffr in zip(resolutionPcts, firstFixPcts)]
         firstFixedResolutionsOpposite = [round(res - ffr, 2) for res, ffr in zip(resolutionPcts, firstFixedResolutions)]
 
         print(f'%:{resolutionPcts}, FFResolution:{firstFixedResolutions}, FFROpposite:{firstFixedResolutionsOpposite}, avgResolutions:{resolutionsAvg}')
 
-        resolutionBar1 = plt.bar(self.priorityLabels, firstFixedResolutions, color=self.colorsICE[1], label='Fixed at first')
-        resolutionBar2 = plt.bar(self.priorityLabels, firstFixedResolutionsOpposite, bottom=firstFixedResolutions, color=self.colorsICE[0], label='Not fixed at first')
-        plt.scatter(self.priorityLabels, responsePcts, color='black')
-        plt.plot(self.priorityLabels, responsePcts, color='black', label='Response time')
-        plt.ylabel('Time taken from targets')
-        plt.gca().yaxis.set_major_formatter('{x:.0%}') # Set Y axis to percentage format
-        plt.ylim(0, 1)  # Set Y axis limits
-        plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+        figure = self._figure()
+        ax = figure.subplots()
+        resolutionBar1 = ax.bar(self.priorityLabels, firstFixedResolutions, color=self.colorsICE[1], label='Fixed at first')
+        resolutionBar2 = ax.bar(self.priorityLabels, firstFixedResolutionsOpposite, bottom=firstFixedResolutions, color=self.colorsICE[0], label='Not fixed at first')
+        ax.scatter(self.priorityLabels, responsePcts, color='black')
+        ax.plot(self.priorityLabels, responsePcts, color='black', label='Response time')
+        ax.set_ylabel('Time taken from targets')
+        ax.yaxis.set_major_formatter('{x:.0%}') # Set Y axis to percentage format
+        ax.set_ylim(0, 1)  # Set Y axis limits
+        ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
 
         for i, (priority, (rect1, rect2)) in enumerate(zip(self.priorityLabels, zip(resolutionBar1, resolutionBar2))):
             height = rect1.get_height() + rect2.get_height()
-            plt.text(rect1.get_x() + rect1.get_width() / 2, height, f'AVG:{resolutionsAvg[i]} min', ha='center', va='bottom')
-        return plt
+            ax.text(rect1.get_x() + rect1.get_width() / 2, height, f'AVG:{resolutionsAvg[i]} min', ha='center', va='bottom')
+        return figure
 
     def _generateSatisfactionGraph(self, df:pd.DataFrame): # TODO to complete
         df['satisfaction rating'] = pd.to_numeric(df['satisfaction rating'], errors='coerce')
         reviews = df['satisfaction rating'].value_counts()
         reviewsAvg = round(reviews.sum() / len(reviews),2)
         reviewsRate= round(len(reviews) / (df['resolution'] == 'Closed').sum(),2)
-        print(reviewsAvg,reviewsRate)
\ No newline at end of file
+        print(reviewsAvg,reviewsRate)
+
+# PROCESS POOL
+_workerVisualiser = None
+
+def _initWorker(vector:bool, profile:bool = False):
+    '''Each worker process renders with its own Visualiser, so the pyplot state is never shared'''
+    global _workerVisualiser
+    _workerVisualiser = Visualiser(vector= vector, profiler= Profiler(enabled= profile))
+
+def _renderJob(job:tuple):
+    '''It returns the artifact of the job and the stages timed while rendering it'''
+    _workerVisualiser.profiler.reset()
+    artifact = _workerVisualiser._renderJob(job)
+    return artifact, _workerVisualiser.profiler.records
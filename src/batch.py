@@ -0,0 +1,153 @@
+'''
+Headless entry point that generates several reports from a single dataset in one process.
+The dataset is formatted once and every job reuses it, so the imports and the formatting are only paid once.
+
+Run it from the repository root:
+    python src/batch.py EXPORT.csv --jobs jobs.json
+    python src/batch.py EXPORT.csv --all-clients --start 01/09/2024 --end 30/09/2024 --output-dir reports
+
+A jobs file is a JSON list of objects with the keys: client, start, end, output and optionally title and author.
+Dates use the dd/mm/yyyy format, as in the GUI.
+With --partition, a merged export holding several clients is split by its "cost centre" column (see "clientPartition" in details.json)
+and every report only receives the tickets of its client.
+'''
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime as dt
+import matplotlib
+matplotlib.use('Agg') # No display is needed to render the charts
+import pandas as pd
+import Handler as Handler
+import Visualiser as Visualiser
+from Cache import Cache
+from Store import Store
+from Profiler import Profiler
+
+defaultTitle = 'MANAGED SERVICE REPORT'
+defaultAuthor = 'Freddy Loft'
+dateFormat = '%d/%m/%Y'
+
+def parseArguments(argv=None):
+    parser = argparse.ArgumentParser(description='Generate several client reports from a single dataset')
+    parser.add_argument('input', nargs='?', help='JIRA export or formatted CSV file')
+    parser.add_argument('--store', help='SQLite ticket store. The input, if any, is upserted into it and the reports read their tickets from it')
+    parser.add_argument('--jobs', help='JSON file holding the list of reports to generate')
+    parser.add_argument('--all-clients', action='store_true', help='Generate one report per client listed in details.json')
+    parser.add_argument('--start', help='Start date (dd/mm/yyyy) used with --all-clients')
+    parser.add_argument('--end', help='End date (dd/mm/yyyy) used with --all-clients')
+    parser.add_argument('--title', default=defaultTitle)
+    parser.add_argument('--author', default=defaultAuthor)
+    parser.add_argument('--output-dir', default='.', help='Directory of the reports generated with --all-clients')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used to render the figures of each report')
+    parser.add_argument('--parallel-reports', type=int, default=1, help='Number of reports generated concurrently')
+    parser.add_argument('--vector', action='store_true', help='Embed the charts as vector drawings (requires svglib)')
+    parser.add_argument('--image-tables', action='store_true', help='Render the ticket tables as matplotlib images instead of native PDF tables')
+    parser.add_argument('--partition', action='store_true', help='Give each report only the tickets of its client, splitting the dataset by client once')
+    parser.add_argument('--no-cache', action='store_true', help='Format the input and render the charts even if cached copies exist')
+    parser.add_argument('--profile', metavar='FILE', help='Write the time, peak memory and rows of every stage to FILE (JSON) and print a summary')
+    parser.add_argument('--profile-memory', action='store_true', help='Also trace the peak memory of every stage with --profile. It slows the run down')
+    args = parser.parse_args(argv)
+    if not args.input and not args.store:
+        parser.error('an input file, a --store or both are required')
+    if not args.jobs and not args.all_clients:
+        parser.error('either --jobs or --all-clients is required')
+    if args.all_clients and not (args.start and args.end):
+        parser.error('--all-clients requires --start and --end')
+    return args
+
+def loadJobs(args, clients:list):
+    '''It returns the list of jobs to run, each of them with every field filled in'''
+    if args.jobs:
+        with open(args.jobs, 'r') as file:
+            jobs = json.load(file)
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        jobs = [{'client': client, 'start': args.start, 'end': args.end, 'output': os.path.join(args.output_dir, client.replace(' ', '_'))} for client in clients]
+    for job in jobs:
+        job.setdefault('title', args.title)
+        job.setdefault('author', args.author)
+        job['start'] = dt.strptime(job['start'], dateFormat)
+        job['end'] = dt.strptime(job['end'], dateFormat)
+    return jobs
+
+def runJob(visualiser:Visualiser.Visualiser, source, job:dict, totals:pd.DataFrame = None):
+    '''
+    It generates the report of a job from a formatted dataframe or a Store. It returns True when the report was generated.
+    @totals are the time graph totals of the whole history when the dataframe only holds a window of it.
+    '''
+    print(f"Generating {job['output']}.pdf for {job['client']}")
+    if isinstance(source, pd.DataFrame) and source.empty:
+        print(f"[batch]: There are no tickets for {job['client']}, the report {job['output']} was not generated")
+        return False
+    try:
+        if isinstance(source, Store):
+            visualiser.runStore(source, job['start'], job['end'], job['output'], job['title'], job['author'], job['client'])
+        else:
+            visualiser.run(source, job['start'], job['end'], job['output'], job['title'], job['author'], job['client'], totals= totals)
+        return True
+    except Exception as e:
+        print(f"[batch]: The report {job['output']} could not be generated ({e})")
+        return False
+
+# Concurrent reports run in separate processes. Each of them receives the formatted dataset once, or opens its own connection to the store
+_workerSource, _workerCache = None, None
+
+def _initReportWorker(df, storeFile, cache):
+    global _workerSource, _workerCache
+    _workerSource = Store(storeFile) if storeFile else df
+    _workerCache = cache
+
+def _runReportWorker(job:dict, args, source = None, totals = None):
+    profiler = Profiler(enabled= bool(args.profile), memory= args.profile_memory)
+    visualiser = Visualiser.Visualiser(workers= args.workers, vector= args.vector, nativeTables= not args.image_tables, profiler= profiler, renderCache= _workerCache)
+    return runJob(visualiser, _workerSource if source is None else source, job, totals), profiler.records
+
+def partitionSources(handler:Handler.Handler, source, jobs:list):
+    '''
+    It returns the tickets of the client of every job, splitting the dataset once, and the time graph totals of each job.
+    A store is read once for the dates of all the jobs, and its totals over the whole history are added up by client in the same way. A dataframe needs no totals.
+    '''
+    clients = [job['client'] for job in jobs]
+    totals = {}
+    if isinstance(source, Store):
+        totals = handler.partitionDf(source.priorityTotals(groupBy=[handler.clientColumn]), clients)
+        startDate = min(Visualiser.Visualiser.windowStart(job['start'], job['end']) for job in jobs)
+        source = source.query(startDate, max(Visualiser.Visualiser.windowEnd(job['end']) for job in jobs), includeOpen=True)
+    partitions = handler.partitionDf(source, clients)
+    return [partitions.get(client, source.iloc[0:0]) for client in clients], [totals.get(client) for client in clients]
+
+
+def main(argv=None):
+    args = parseArguments(argv)
+    profiler = Profiler(enabled= bool(args.profile), memory= args.profile_memory)
+    handler = Handler.Handler(profiler= profiler)
+    cache = Cache.fromConfiguration(handler.cacheSettings)
+    cache.enabled = cache.enabled and not args.no_cache
+
+    jobs = loadJobs(args, handler.clients)
+    df = handler.formatFile(args.input, cache) if args.input else None
+    store = Store(args.store) if args.store else None
+    if store and df is not None:
+        handler.upsertDf(df, store)
+    sources, totals = partitionSources(handler, store or df, jobs) if args.partition else ([None] * len(jobs), [None] * len(jobs))
+    if args.parallel_reports > 1:
+        shared = None if store or args.partition else df # Partitions are sent with their job instead
+        with ProcessPoolExecutor(max_workers= args.parallel_reports, initializer= _initReportWorker, initargs= (shared, None if args.partition else args.store, cache)) as pool:
+            results = []
+            for result, records in pool.map(_runReportWorker, jobs, [args] * len(jobs), sources, totals):
+                results.append(result)
+                profiler.merge(records)
+    else:
+        visualiser = Visualiser.Visualiser(workers= args.workers, vector= args.vector, nativeTables= not args.image_tables, profiler= profiler, renderCache= cache)
+        results = [runJob(visualiser, store or df if source is None else source, job, jobTotals) for job, source, jobTotals in zip(jobs, sources, totals)]
+    print(f"{sum(results)} of {len(jobs)} reports generated")
+    if args.profile:
+        profiler.toJson(args.profile)
+        print(profiler.summary())
+    return 0 if all(results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,59 +1,164 @@
-import Handler as Handler
+import time
+startTime = time.perf_counter()
+import sys
+import threading
 import GUI as GUI
 import PySimpleGUI as sg
-import pandas as pd
-import os
-import shutil
-import Visualiser as Visualiser
-
-def clearResources():
-    subDir = [f for f in os.listdir('resources')]
-    for directory in subDir:
-        fileName = f'{'resources'}/{directory}'
-        shutil.rmtree(fileName)
-        os.makedirs(fileName, exist_ok=True)
+from Config import Config
+from Progress import Progress, Cancelled
+from Profiler import Profiler
+
+timings = {'GUI imports': time.perf_counter() - startTime}
+handler, visualiser, cache, backendError = None, None, None, None
+
+def loadBackend():
+    '''
+    It imports pandas, matplotlib and reportlab and builds the Handler and Visualiser. It runs in the background while the window is already shown.
+    An error is kept in @backendError, since it would otherwise be lost with the thread.
+    '''
+    global handler, visualiser, cache, backendError
+    try:
+        start = time.perf_counter()
+        import matplotlib
+        matplotlib.use('Agg') # Figures are rendered to memory only
+        import Handler as Handler
+        import Visualiser as Visualiser
+        from Cache import Cache
+        timings['Backend imports (background)'] = time.perf_counter() - start
+        handler = Handler.Handler(progress= progress, profiler= profiler)
+        cache = Cache.fromConfiguration(handler.cacheSettings)
+        visualiser = Visualiser.Visualiser(progress= progress, profiler= profiler, renderCache= cache)
+        timings['Backend ready (background)'] = time.perf_counter() - startTime
+    except Exception as e:
+        backendError = e
+
+def waitForBackend():
+    '''It waits until the backend is loaded and raises the error that stopped it from loading, if any'''
+    backendThread.join()
+    if backendError is not None:
+        raise RuntimeError(f'The backend could not be loaded: {backendError!r}') from backendError
 
 def loadDataframe(fileName):
-    df = pd.read_csv(fileName, index_col=False)
-    df.columns = df.columns.str.lower()
+    df = handler.loadDf(fileName)
     print(f"File read: {fileName}. Dimensions: {df.shape[1]} x {df.shape[0]}")
     return df
 
-clearResources()
+def getDataframe():
+    '''It returns the working dataframe, reading the selected file the first time it is needed'''
+    global df
+    if df is None:
+        df = loadDataframe(sourceFile)
+    return df
+
+def formatDataframe():
+    '''It formats the working dataframe once. An unmerged file is served from the cache when it has not changed'''
+    global df, isFormatted
+    if not isFormatted:
+        df = handler.formatFile(sourceFile, cache) if df is None else handler.formatDf(df)
+        isFormatted = True
+    return df
+
+def postProgress(stage, done, total):
+    '''It forwards the progress of the worker thread to the event loop, which is the only one allowed to update the window'''
+    gui.window.write_event_value('PROGRESS', (stage, done, total))
+
+def startTask(work, doneEvent:str):
+    '''It runs @work in a worker thread so the window keeps responding. The result is delivered as @doneEvent with (ok, value)'''
+    global busy
+    def task():
+        try:
+            return True, work()
+        except Cancelled:
+            return False, 'The operation has been cancelled'
+        except Exception as e:
+            return False, f'The operation failed: {e}'
+    busy = True
+    progress.reset()
+    gui.window.perform_long_operation(task, doneEvent)
+
+def reportTask(startDate, endDate, filePath, title, author, client, checkBox):
+    df = formatDataframe()
+    visualiser.run(df, startDate, endDate, filePath, title, author, client)
+    if checkBox:
+        handler.saveDf(df, filePath)
+    return filePath
+
+progress = Progress(postProgress)
+profiler = Profiler(enabled= '--profile' in sys.argv)
+backendThread = threading.Thread(target=loadBackend, daemon=True)
+backendThread.start()
+start = time.perf_counter()
+Config.load()
+timings['Configuration'] = time.perf_counter() - start
+start = time.perf_counter()
 gui = GUI.GUI()
-handler = Handler.Handler()
-visualiser = Visualiser.Visualiser()
+timings['Window'] = time.perf_counter() - start
+timings['First window shown'] = time.perf_counter() - startTime
+if '--timings' in sys.argv:
+    waitForBackend()
+    print('Startup timings:')
+    for stage, seconds in timings.items():
+        print(f"  {stage:<30} {seconds * 1000:8.1f} ms")
+df, sourceFile, isFormatted, busy = None, None, False, False
 
 while gui.window:
     event, values = gui.window.read() # type: ignore
     if event == sg.WIN_CLOSED:
+        progress.cancel()
         gui.window.close()
         break
+    elif event == 'PROGRESS':
+        gui.showProgress(*values[event])
+    elif event == 'CANCEL':
+        progress.cancel()
+    elif event in ('FORMAT_DONE', 'MERGE_DONE', 'REPORT_DONE'):
+        busy = False
+        ok, answer = values[event]
+        if profiler.enabled:
+            print(profiler.summary())
+            profiler.reset()
+        if not ok:
+            gui.showProgress(answer, 0, 0)
+        elif event == 'REPORT_DONE':
+            gui.window.close()
+            sg.popup_ok(f'File has been saved as {answer}')
+            break
+        else:
+            gui.showProgress('Done', 0, 0)
+    elif busy:
+        continue # Only one operation runs at a time
     else:
+        if gui.currentLayout != 'Main':
+            try:
+                waitForBackend()
+            except RuntimeError as e:
+                print(f"[main]: {e}")
+                gui.window.close()
+                sg.popup_error(str(e))
+                break
         if gui.currentLayout == 'Main':
             filePath = gui.handleEvent(event, values)
             if filePath:
-                df = loadDataframe(filePath)
+                df, sourceFile, isFormatted = None, filePath, False
         elif gui.currentLayout == 'Import':
             answer = gui.handleImport(event, values)
             if answer and event == 'MERGE':
-                df = handler.mergeDf(df,loadDataframe(answer))
-                print(len(df))
+                policy = 'newest' if values.get('NEWEST') else 'first'
+                def mergeTask(fileName=answer, policy=policy):
+                    global df, isFormatted
+                    df = handler.mergeDf(getDataframe(),loadDataframe(fileName),policy)
+                    isFormatted = False
+                    print(len(df))
+                startTask(mergeTask, 'MERGE_DONE')
             elif event == 'FORMAT':
-                df = handler.formatDf(df)
+                startTask(formatDataframe, 'FORMAT_DONE')
             elif answer and event == 'SAVE':
                 gui.window.close()
-                handler.saveDf(df,answer)
+                handler.saveDf(getDataframe(),answer)
                 sg.popup_ok(f'File saved has been as {answer}')
                 break
                 
         elif gui.currentLayout == 'Report':
             startDate, endDate, filePath, title, author, client, checkBox = gui.handleReport(event, values)
             if startDate and endDate and filePath:
-                gui.window.close()
-                df = handler.formatDf(df)
-                visualiser.run(df, startDate, endDate, filePath, title, author, client)
-                if checkBox:
-                    handler.saveDf(df, filePath)
-                sg.popup_ok(f'File has been saved as {filePath}')
-                break
\ No newline at end of file
+                startTask(lambda: reportTask(startDate, endDate, filePath, title, author, client, checkBox), 'REPORT_DONE')